@@ -0,0 +1,103 @@
+import copy
+import threading
+from .numpy_policy import NumpyPolicy
+
+
+class AsyncLearner:
+    """Background learner thread for `DQNAgent` (actor/learner split).
+
+    The simulation thread only stores transitions and picks actions with
+    `policy`, NumPy views of `acting_model`, a copy of the online network.
+    This thread samples the replay memory and runs gradient steps, aiming
+    for `updates_per_step` updates per environment step (it lags behind
+    rather than blocking the simulation when backprop is slower), updates
+    the target network every `target_update_interval` updates and copies
+    the trained weights into `acting_model` every `publish_interval` updates.
+    """
+
+    def __init__(self, agent, updates_per_step=1.0, publish_interval=10, target_update_interval=10):
+        self.agent = agent
+        self.updates_per_step = updates_per_step
+        self.publish_interval = publish_interval
+        self.target_update_interval = target_update_interval
+
+        self.acting_model = copy.deepcopy(agent.model)
+        self.policy = NumpyPolicy.from_model(self.acting_model)
+        # memory_lock guards the replay memory, weights_lock guards acting_model
+        self.memory_lock = threading.Lock()
+        self.weights_lock = threading.Lock()
+        self.condition = threading.Condition()
+
+        self.steps = 0
+        self.updates = 0
+        self.error = None
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="DQNLearner", daemon=True)
+        self.thread.start()
+
+    def add(self, state, action, reward, next_state, done, discount=None):
+        self._raise_error()
+        with self.memory_lock:
+            self.agent.memory.add(state, action, reward, next_state, done, discount)
+        self._step()
+
+    def add_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        self._raise_error()
+        with self.memory_lock:
+            self.agent.memory.add_batch(states, actions, rewards, next_states, dones, discounts)
+        self._step()
+
+    def publish(self):
+        with self.weights_lock:
+            self.acting_model.load_state_dict(self.agent.model.state_dict())
+
+    def close(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+        self.publish()
+        self._raise_error()
+
+    def _step(self):
+        with self.condition:
+            self.steps += 1
+            self.condition.notify()
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        agent = self.agent
+        try:
+            while True:
+                with self.condition:
+                    while not self.stopped and self.updates >= self.steps * self.updates_per_step:
+                        self.condition.wait()
+                    if self.stopped:
+                        return
+
+                with self.memory_lock:
+                    if len(agent.memory) < agent.batch_size:
+                        batch = None
+                    else:
+                        batch = agent.memory.sample(agent.batch_size)
+                if batch is None:
+                    # Not enough transitions yet; count it so the learner waits for the next step
+                    self.updates += 1
+                    continue
+
+                td_errors = agent.train_on_batch(batch)
+                if td_errors is not None:
+                    with self.memory_lock:
+                        agent.memory.update_priorities(batch[-1], td_errors)
+
+                self.updates += 1
+                if self.updates % self.target_update_interval == 0:
+                    agent.update_target_model()
+                if self.updates % self.publish_interval == 0:
+                    self.publish()
+        except Exception as e:
+            self.error = e
@@ -5,8 +5,40 @@ class BaseAgent:
     def act(self, state):
         raise NotImplementedError
 
-    def learn(self, state, action, reward, next_state, done):
+    def learn(self, state, action, reward, next_state, done, discount=None):
         """
-        Update the internal model/policy based on the experience.
+        Update the internal model/policy based on the experience. `discount`
+        is the factor to bootstrap next_state's value with; None means one
+        step (gamma), a decision held for k ticks passes gamma^k.
+        """
+        raise NotImplementedError
+
+    def act_batch(self, states):
+        return [self.act(state) for state in states]
+
+    def learn_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        """
+        Update from one transition per environment of a vectorized environment.
+        """
+        if discounts is None:
+            discounts = [None] * len(actions)
+        for transition in zip(states, actions, rewards, next_states, dones, discounts):
+            self.learn(*transition)
+
+    def close(self):
+        """
+        Release background resources (threads, files). Safe to call more than once.
+        """
+        pass
+
+    def save(self, path):
+        """
+        Write the agent's learned state to the checkpoint directory `path`.
+        """
+        raise NotImplementedError
+
+    def load(self, path):
+        """
+        Restore learned state written by `save` into this agent (warm start).
         """
         raise NotImplementedError
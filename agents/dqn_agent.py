@@ -1,10 +1,14 @@
+import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
 import random
-from collections import deque
 from .base_agent import BaseAgent
+from .replay_buffer import ReplayBuffer
+from .prioritized_replay import PrioritizedReplayBuffer
+from .async_learner import AsyncLearner
+from .numpy_policy import NumpyPolicy
 
 class DQN(nn.Module):
     def __init__(self, state_size, action_size):
@@ -19,7 +23,9 @@ class DQN(nn.Module):
         return self.fc3(x)
 
 class DQNAgent(BaseAgent):
-    def __init__(self, state_size, action_size, gamma=0.99, epsilon=1.0, epsilon_min=0.1, epsilon_decay=0.99, lr=0.001, batch_size=64, memory_size=10000):
+    def __init__(self, state_size, action_size, gamma=0.99, epsilon=1.0, epsilon_min=0.1, epsilon_decay=0.99, lr=0.001, batch_size=64, memory_size=10000,
+                 prioritized_replay=False, per_alpha=0.6, per_beta=0.4,
+                 async_learning=False, updates_per_step=1.0, publish_interval=10):
         super().__init__(range(action_size))
         self.state_size = state_size
         self.action_size = action_size
@@ -29,7 +35,11 @@ class DQNAgent(BaseAgent):
         self.epsilon_decay = epsilon_decay
         self.lr = lr
         self.batch_size = batch_size
-        self.memory = deque(maxlen=memory_size)
+        self.prioritized_replay = prioritized_replay
+        if prioritized_replay:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size, alpha=per_alpha, beta=per_beta, discount=gamma)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size, discount=gamma)
         
         self.model = DQN(state_size, action_size)
         self.target_model = DQN(state_size, action_size)
@@ -37,40 +47,66 @@ class DQNAgent(BaseAgent):
         self.criterion = nn.MSELoss()
         
         self.update_target_counter = 0
+        # NumPy views of the online weights for action selection
+        self.policy = NumpyPolicy.from_model(self.model)
 
-    def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        # With async_learning, gradient steps run on a background thread and act() uses a published copy of the model
+        self.learner = None
+        if async_learning:
+            self.learner = AsyncLearner(self, updates_per_step=updates_per_step, publish_interval=publish_interval)
+
+    def remember(self, state, action, reward, next_state, done, discount=None):
+        self.memory.add(state, action, reward, next_state, done, discount)
+
+    def q_values(self, states):
+        if self.learner is None:
+            return self.policy.q_values(states)
+        with self.learner.weights_lock:
+            return self.learner.policy.q_values(states)
 
     def act(self, state):
         if np.random.rand() <= self.epsilon:
             return random.randrange(self.action_size)
-        state = torch.FloatTensor(state).unsqueeze(0)
-        act_values = self.model(state)
-        return torch.argmax(act_values[0]).item()
+        return int(self.q_values(state).argmax())
+
+    def act_batch(self, states):
+        actions = self.q_values(states).argmax(axis=1)
+        explore = np.random.rand(len(actions)) <= self.epsilon
+        actions[explore] = np.random.randint(self.action_size, size=explore.sum())
+        return actions
 
     def replay(self):
         if len(self.memory) < self.batch_size:
             return
-        minibatch = random.sample(self.memory, self.batch_size)
-
-        states, actions, rewards, next_states, dones = zip(*minibatch)
-        states = torch.FloatTensor(states)
-        next_states = torch.FloatTensor(next_states)
-        actions = torch.LongTensor(actions)
-        rewards = torch.FloatTensor(rewards)
-        dones = torch.FloatTensor(dones)
-
+        batch = self.memory.sample(self.batch_size)
+        td_errors = self.train_on_batch(batch)
+        if td_errors is not None:
+            self.memory.update_priorities(batch[-1], td_errors)
+
+    def train_on_batch(self, batch):
+        """
+        One gradient step on a sampled batch. Returns the TD errors of the
+        taken actions when using prioritized replay, else None.
+        """
+        if self.prioritized_replay:
+            states, actions, rewards, next_states, dones, discounts, weights, indices = batch
+        else:
+            states, actions, rewards, next_states, dones, discounts = batch
 
-        target_qs = self.model(states).clone()
+        qs = self.model(states)
+        target_qs = qs.detach().clone()
         with torch.no_grad():
             next_qs = self.target_model(next_states).max(dim=1)[0]
-            target_qs[range(self.batch_size), actions] = rewards + self.gamma * next_qs * (1 - dones)
-
+            target_qs[range(self.batch_size), actions] = rewards + discounts * next_qs * (1 - dones)
 
-        qs = self.model(states)
 
-
-        loss = self.criterion(qs, target_qs)
+        td_errors = None
+        if self.prioritized_replay:
+            # Importance-sampling weighted MSE; new priorities from the TD errors of the taken actions
+            loss = (weights * ((qs - target_qs) ** 2).mean(dim=1)).mean()
+            td_errors = (target_qs - qs)[range(self.batch_size), actions].detach().numpy()
+        else:
+            loss = self.criterion(qs, target_qs)
 
 
         self.optimizer.zero_grad()
@@ -79,16 +115,91 @@ class DQNAgent(BaseAgent):
 
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
+        return td_errors
 
     def update_target_model(self):
         self.target_model.load_state_dict(self.model.state_dict())
 
-    def learn(self, state, action, reward, next_state, done):
+    def learn(self, state, action, reward, next_state, done, discount=None):
+        if self.learner is not None:
+            self.learner.add(state, action, reward, next_state, done, discount)
+            return
 
-        self.remember(state, action, reward, next_state, done)
+        self.remember(state, action, reward, next_state, done, discount)
         self.replay()
         
         # Periodic target update
         self.update_target_counter += 1
         if self.update_target_counter % 10 == 0:
             self.update_target_model()
+
+    def learn_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        if self.learner is not None:
+            self.learner.add_batch(states, actions, rewards, next_states, dones, discounts)
+            return
+
+        # One gradient step and one target-update tick per batch of transitions
+        self.memory.add_batch(states, actions, rewards, next_states, dones, discounts)
+        self.replay()
+
+        self.update_target_counter += 1
+        if self.update_target_counter % 10 == 0:
+            self.update_target_model()
+
+    def export_policy(self):
+        """
+        Greedy NumpyPolicy with a snapshot of the current weights, independent
+        of further training.
+        """
+        if self.learner is not None:
+            with self.learner.weights_lock:
+                return NumpyPolicy.from_model(self.learner.acting_model, copy=True)
+        return NumpyPolicy.from_model(self.model, copy=True)
+
+    def close(self):
+        if self.learner is not None:
+            self.learner.close()
+            self.learner = None
+
+    def save(self, path, include_replay=False):
+        """
+        Write networks, optimizer and exploration state to `path/dqn.pt`, the
+        greedy NumpyPolicy to `path/policy.npz`, and with `include_replay`
+        the replay memory to `path/replay.npz`.
+        """
+        if self.learner is not None:
+            raise RuntimeError("Close the async learner before saving a DQN checkpoint")
+        os.makedirs(path, exist_ok=True)
+        checkpoint = {
+            'model': self.model.state_dict(),
+            'target_model': self.target_model.state_dict(),
+            'optimizer': self.optimizer.state_dict(),
+            'epsilon': self.epsilon,
+            'update_target_counter': self.update_target_counter,
+        }
+        tmp = os.path.join(path, 'dqn.pt.tmp')
+        torch.save(checkpoint, tmp)
+        os.replace(tmp, os.path.join(path, 'dqn.pt'))
+
+        tmp = os.path.join(path, 'policy.tmp.npz')
+        self.export_policy().save(tmp)
+        os.replace(tmp, os.path.join(path, 'policy.npz'))
+
+        if include_replay:
+            tmp = os.path.join(path, 'replay.tmp.npz')
+            self.memory.save(tmp)
+            os.replace(tmp, os.path.join(path, 'replay.npz'))
+
+    def load(self, path):
+        checkpoint = torch.load(os.path.join(path, 'dqn.pt'))
+        self.model.load_state_dict(checkpoint['model'])
+        self.target_model.load_state_dict(checkpoint['target_model'])
+        self.optimizer.load_state_dict(checkpoint['optimizer'])
+        self.epsilon = checkpoint['epsilon']
+        self.update_target_counter = checkpoint['update_target_counter']
+
+        replay = os.path.join(path, 'replay.npz')
+        if os.path.exists(replay):
+            self.memory.load(replay)
+        if self.learner is not None:
+            self.learner.publish()
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class NumpyPolicy:
+    """Greedy, inference-only policy for a ReLU MLP such as `DQN`.
+
+    Holds one (weight, bias) pair of float32 arrays per linear layer and
+    computes Q-values with a few matmuls, without torch dispatch or
+    autograd. `from_model` can share memory with the model's parameters,
+    so in-place optimizer steps and `load_state_dict` show up immediately;
+    `save`/`load` give a torch-free artifact for deployment.
+    """
+
+    def __init__(self, layers):
+        self.layers = [(np.asarray(weight, dtype=np.float32), np.asarray(bias, dtype=np.float32)) for weight, bias in layers]
+
+    @classmethod
+    def from_model(cls, model, copy=False):
+        """
+        Policy over the linear layers of `model`, in definition order.
+        Without `copy` the arrays are views of the parameters and follow
+        every update of the model.
+        """
+        layers = []
+        for layer in model.children():
+            weight, bias = layer.weight.detach().numpy(), layer.bias.detach().numpy()
+            layers.append((weight.copy(), bias.copy()) if copy else (weight, bias))
+        return cls(layers)
+
+    @property
+    def state_size(self):
+        return self.layers[0][0].shape[1]
+
+    @property
+    def action_size(self):
+        return self.layers[-1][0].shape[0]
+
+    def q_values(self, states):
+        # (action_size,) for one state, (n, action_size) for a batch
+        x = np.asarray(states, dtype=np.float32)
+        last = len(self.layers) - 1
+        for i, (weight, bias) in enumerate(self.layers):
+            x = x @ weight.T + bias
+            if i < last:
+                np.maximum(x, 0, out=x)
+        return x
+
+    def act(self, state):
+        return int(self.q_values(state).argmax())
+
+    def act_batch(self, states):
+        return self.q_values(states).argmax(axis=-1)
+
+    def save(self, path):
+        arrays = {}
+        for i, (weight, bias) in enumerate(self.layers):
+            arrays[f"weight{i}"] = weight
+            arrays[f"bias{i}"] = bias
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            num_layers = len(data.files) // 2
+            return cls([(data[f"weight{i}"], data[f"bias{i}"]) for i in range(num_layers)])
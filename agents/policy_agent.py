@@ -0,0 +1,25 @@
+from .base_agent import BaseAgent
+
+
+class PolicyAgent(BaseAgent):
+    """Agent that acts with a frozen greedy policy (`NumpyPolicy`, `TablePolicy`) and never learns.
+
+    No exploration, no replay memory and no updates, for evaluating a
+    trained policy.
+    """
+
+    def __init__(self, policy):
+        super().__init__(range(policy.action_size))
+        self.policy = policy
+
+    def act(self, state):
+        return self.policy.act(state)
+
+    def act_batch(self, states):
+        return self.policy.act_batch(states)
+
+    def learn(self, state, action, reward, next_state, done, discount=None):
+        pass
+
+    def learn_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        pass
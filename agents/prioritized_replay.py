@@ -0,0 +1,109 @@
+import numpy as np
+import torch
+from .replay_buffer import ReplayBuffer
+
+
+class SumTree:
+    """Binary tree whose internal nodes hold the sum of their children's priorities.
+
+    Leaves live at `[size, 2 * size)` of a flat array and node `i` has
+    children `2i` and `2i + 1`, so both batched updates and batched
+    prefix-sum lookups are O(log n) vectorized passes over the levels.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.size = 1 << self.depth
+        self.tree = np.zeros(2 * self.size, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def leaves(self, indices):
+        return self.tree[np.asarray(indices) + self.size]
+
+    def update(self, indices, priorities):
+        nodes = np.asarray(indices) + self.size
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        # Leaf index whose cumulative priority range contains each value
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = self.tree[2 * nodes]
+            go_right = values >= left
+            values -= left * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """Proportional prioritized experience replay (Schaul et al., 2016).
+
+    Transitions are sampled with probability p_i^alpha / sum_k p_k^alpha,
+    where p_i is the last absolute TD error of transition i (new
+    transitions get the highest priority seen so far). `sample` also
+    returns importance-sampling weights, normalised to a maximum of 1,
+    whose exponent beta is annealed towards 1 on every call.
+    """
+
+    def __init__(self, capacity, state_size, alpha=0.6, beta=0.4, beta_increment=1e-4, epsilon=1e-5, discount=0.99, rng=None):
+        super().__init__(capacity, state_size, discount=discount, rng=rng)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done, discount=None):
+        i = super().add(state, action, reward, next_state, done, discount)
+        self.tree.update([i], self.max_priority ** self.alpha)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        indices = super().add_batch(states, actions, rewards, next_states, dones, discounts)
+        self.tree.update(indices, np.full(len(indices), self.max_priority ** self.alpha))
+        return indices
+
+    def sample_indices(self, batch_size):
+        # Stratified sampling: one draw from each of batch_size equal slices of the total priority
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        indices = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+        return np.minimum(indices, self.size - 1)
+
+    def sample(self, batch_size):
+        indices = self.sample_indices(batch_size)
+
+        probabilities = self.tree.leaves(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return self.gather(indices) + (torch.from_numpy(weights.astype(np.float32)), indices)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(td_errors) + self.epsilon
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def state_arrays(self):
+        return dict(super().state_arrays(), tree=self.tree.tree, max_priority=self.max_priority, beta=self.beta)
+
+    def load_state_arrays(self, data):
+        super().load_state_arrays(data)
+        if 'tree' in data:
+            self.tree.tree[:] = data['tree']
+            self.max_priority = float(data['max_priority'])
+            self.beta = float(data['beta'])
+        else:
+            # Saved from a uniform buffer: every stored transition starts at the maximum priority
+            self.tree.tree[:] = 0
+            self.tree.update(np.arange(self.size), np.full(self.size, self.max_priority ** self.alpha))
@@ -1,6 +1,9 @@
+import os
+import json
 import numpy as np
 import random
 from .base_agent import BaseAgent
+from .q_table import QTable
 
 class QLearningAgent(BaseAgent):
     def __init__(self, actions, alpha=0.1, gamma=0.9, epsilon=0.1):
@@ -8,24 +11,35 @@ class QLearningAgent(BaseAgent):
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.q_table = {}
+        self.q_table = QTable(len(self.actions))
 
     def get_q_value(self, state, action):
-        if state not in self.q_table:
-            self.q_table[state] = np.zeros(len(self.actions))
-        return self.q_table[state][action]
+        return self.q_table.values[self.q_table.intern(state), action]
 
     def act(self, state):
-        if state not in self.q_table:
-            self.q_table[state] = np.zeros(len(self.actions))
+        row = self.q_table.intern(state)
 
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(range(len(self.actions)))  # Exploration
         else:
-            return np.argmax(self.q_table[state])  # Exploitation
+            return int(self.q_table.values[row].argmax())  # Exploitation
 
-    def learn(self, state, action, reward, next_state, done):
-        best_next_action = np.argmax(self.q_table.get(next_state, np.zeros(len(self.actions))))
-        td_target = reward + self.gamma * self.get_q_value(next_state, best_next_action)
-        td_error = td_target - self.get_q_value(state, action)
-        self.q_table[state][action] += self.alpha * td_error
+    def learn(self, state, action, reward, next_state, done, discount=None):
+        # Intern both states before touching values: interning may grow (reallocate) the array
+        row = self.q_table.intern(state)
+        next_row = self.q_table.intern(next_state)
+        q_values = self.q_table.values
+
+        discount = self.gamma if discount is None else discount
+        td_target = reward + discount * q_values[next_row].max()
+        td_error = td_target - q_values[row, action]
+        q_values[row, action] += self.alpha * td_error
+
+    def save(self, path):
+        self.q_table.save(path)
+        with open(os.path.join(path, 'agent.json'), 'w') as f:
+            json.dump({'alpha': self.alpha, 'gamma': self.gamma, 'epsilon': self.epsilon}, f)
+
+    def load(self, path, mmap=True):
+        # Hyperparameters stay as constructed; only the learned table is restored
+        self.q_table = QTable.load(path, mmap=mmap)
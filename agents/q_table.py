@@ -0,0 +1,124 @@
+import json
+import os
+import numpy as np
+
+
+class QTable:
+    """Tabular Q-values stored as one growable (states x actions) float array.
+
+    Each distinct hashable state is interned to an integer row id the first
+    time it is seen, so action selection is an argmax over one row and a TD
+    update is a single indexed write, with no per-state array objects or
+    per-(state, action) dict entries.
+    """
+
+    def __init__(self, num_actions, initial_capacity=1024, dtype=np.float64):
+        self.num_actions = num_actions
+        self.index = {}
+        self.states = []
+        self.values = np.zeros((initial_capacity, num_actions), dtype=dtype)
+
+    def __len__(self):
+        return len(self.states)
+
+    def __contains__(self, state):
+        return state in self.index
+
+    def lookup(self, state):
+        # Row id of state, or None if it has never been interned
+        return self.index.get(state)
+
+    def intern(self, state):
+        row = self.index.get(state)
+        if row is None:
+            row = len(self.states)
+            if row == len(self.values):
+                self._grow()
+            self.index[state] = row
+            self.states.append(state)
+        return row
+
+    def get(self, state, action):
+        row = self.index.get(state)
+        if row is None:
+            return 0.0
+        return self.values[row, action]
+
+    def row_values(self, state):
+        row = self.intern(state)  # may grow (reallocate) self.values
+        return self.values[row]
+
+    def _grow(self):
+        grown = np.zeros((max(1, 2 * len(self.values)), self.num_actions), dtype=self.values.dtype)
+        grown[:len(self.values)] = self.values
+        self.values = grown
+
+    def save(self, path):
+        """
+        Write the table to directory `path`: `values.npy` holds the Q-values,
+        `states.npy` the interned states flattened to one numeric row each and
+        `q_table.json` the nesting needed to rebuild the state tuples.
+        """
+        os.makedirs(path, exist_ok=True)
+        size = len(self.states)
+        template = _state_template(self.states[0]) if size else None
+        flat_states = [_flatten_state(state) for state in self.states]
+        if any(_state_template(state) != template for state in self.states):
+            raise ValueError("QTable.save requires all states to have the same nested tuple structure")
+
+        dtype = np.int64 if all(isinstance(v, (int, np.integer)) for row in flat_states for v in row) else np.float64
+        states = np.array(flat_states, dtype=dtype).reshape(size, len(flat_states[0]) if size else 0)
+
+        # Replace files instead of overwriting them: the table may be memory-mapped from this very checkpoint
+        _save_array(os.path.join(path, 'values.npy'), self.values[:size])
+        _save_array(os.path.join(path, 'states.npy'), states)
+        tmp = os.path.join(path, 'q_table.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'version': 1, 'num_actions': self.num_actions, 'size': size, 'template': template}, f)
+        os.replace(tmp, os.path.join(path, 'q_table.json'))
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a table written by `save`. With `mmap`, Q-values are mapped
+        copy-on-write from disk instead of read up front; the table moves
+        to memory once it grows.
+        """
+        with open(os.path.join(path, 'q_table.json')) as f:
+            meta = json.load(f)
+        mmap_mode = 'c' if mmap and meta['size'] else None
+        values = np.load(os.path.join(path, 'values.npy'), mmap_mode=mmap_mode)
+        states = np.load(os.path.join(path, 'states.npy'), mmap_mode='r')
+
+        table = cls(meta['num_actions'], initial_capacity=0, dtype=values.dtype)
+        table.values = values
+        template = meta['template']
+        table.states = [_unflatten_state(iter(row), template) for row in states.tolist()]
+        table.index = {state: i for i, state in enumerate(table.states)}
+        return table
+
+
+def _save_array(filename, array):
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, filename)
+
+
+def _state_template(state):
+    # Nesting of a state: None for a scalar, a list of child templates for a tuple
+    if isinstance(state, tuple):
+        return [_state_template(item) for item in state]
+    return None
+
+
+def _flatten_state(state):
+    if isinstance(state, tuple):
+        return [value for item in state for value in _flatten_state(item)]
+    return [state]
+
+
+def _unflatten_state(values, template):
+    if template is None:
+        return next(values)
+    return tuple(_unflatten_state(values, item) for item in template)
@@ -0,0 +1,63 @@
+import ast
+import importlib
+import importlib.util
+import inspect
+import sys
+
+# Model name -> (module relative to this package, class name). Modules are only
+# imported when their agent is first requested, so e.g. torch is only loaded for 'dqn'.
+AGENTS = {
+    'dqn': ('.dqn_agent', 'DQNAgent'),
+    'q': ('.q_agent', 'QLearningAgent'),
+    'sarsa': ('.sarsa_agent', 'SARSAAgent'),
+}
+
+
+def register_agent(name, module, class_name):
+    """
+    Make agent class `class_name` of `module` (absolute, or relative to
+    `agents`) available as `name`.
+    """
+    AGENTS[name] = (module, class_name)
+
+
+def agent_names():
+    return list(AGENTS)
+
+
+def get_agent_class(name):
+    if name not in AGENTS:
+        raise ValueError(f"Unknown model: {name}")
+    module, class_name = AGENTS[name]
+    return getattr(importlib.import_module(module, __package__), class_name)
+
+
+def agent_parameters(name):
+    """
+    Names of the keyword arguments agent `name`'s constructor accepts, or
+    None if it takes **kwargs or its `__init__` cannot be found. Read from
+    the module source unless the module is already imported, so checking a
+    model does not load its dependencies (e.g. torch).
+    """
+    if name not in AGENTS:
+        raise ValueError(f"Unknown model: {name}")
+    module, class_name = AGENTS[name]
+    module_name = importlib.util.resolve_name(module, __package__)
+    if module_name in sys.modules:
+        parameters = inspect.signature(getattr(sys.modules[module_name], class_name)).parameters.values()
+        if any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters):
+            return None
+        return {parameter.name for parameter in parameters
+                if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)}
+
+    spec = importlib.util.find_spec(module_name)
+    with open(spec.origin) as f:
+        tree = ast.parse(f.read(), spec.origin)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef) and item.name == '__init__':
+                    if item.args.kwarg is not None:
+                        return None
+                    return {arg.arg for arg in item.args.args[1:] + item.args.kwonlyargs}
+    return None
@@ -0,0 +1,100 @@
+import numpy as np
+import torch
+
+
+class ReplayBuffer:
+    """Fixed-size circular replay memory backed by preallocated typed arrays.
+
+    Memory use is fixed at construction (see `nbytes`). Sampling draws
+    indices without replacement and turns the gathered rows into torch
+    tensors with `torch.from_numpy`, without another copy. Each transition
+    stores the discount to bootstrap its next state with: `discount` for a
+    one-step transition, gamma^k for one spanning k ticks.
+    """
+
+    def __init__(self, capacity, state_size, discount=0.99, rng=None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.discount = discount
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        self.discounts = np.zeros(capacity, dtype=np.float32)
+
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return (self.states.nbytes + self.next_states.nbytes + self.actions.nbytes +
+                self.rewards.nbytes + self.dones.nbytes + self.discounts.nbytes)
+
+    def add(self, state, action, reward, next_state, done, discount=None):
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.discounts[i] = self.discount if discount is None else discount
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        n = len(actions)
+        indices = (self.position + np.arange(n)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self.discounts[indices] = self.discount if discounts is None else discounts
+        self.position = (self.position + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+        return indices
+
+    def sample_indices(self, batch_size):
+        return self.rng.choice(self.size, size=batch_size, replace=False)
+
+    def gather(self, indices):
+        return (
+            torch.from_numpy(self.states[indices]),
+            torch.from_numpy(self.actions[indices]),
+            torch.from_numpy(self.rewards[indices]),
+            torch.from_numpy(self.next_states[indices]),
+            torch.from_numpy(self.dones[indices]),
+            torch.from_numpy(self.discounts[indices]),
+        )
+
+    def sample(self, batch_size):
+        return self.gather(self.sample_indices(batch_size))
+
+    def save(self, filename):
+        np.savez(filename, **self.state_arrays())
+
+    def load(self, filename):
+        with np.load(filename) as data:
+            if data['states'].shape != self.states.shape:
+                raise ValueError(f"Replay checkpoint has shape {data['states'].shape}, buffer has {self.states.shape}")
+            self.load_state_arrays(data)
+
+    def state_arrays(self):
+        return dict(states=self.states, next_states=self.next_states, actions=self.actions,
+                    rewards=self.rewards, dones=self.dones, discounts=self.discounts, position=self.position,
+                    size=self.size)
+
+    def load_state_arrays(self, data):
+        for name in ('states', 'next_states', 'actions', 'rewards', 'dones'):
+            getattr(self, name)[:] = data[name]
+        # Checkpoints from before per-transition discounts only hold one-step transitions
+        self.discounts[:] = data['discounts'] if 'discounts' in data else self.discount
+        self.position = int(data['position'])
+        self.size = int(data['size'])
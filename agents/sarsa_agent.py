@@ -1,6 +1,9 @@
+import os
+import json
 import numpy as np
 import random
 from .base_agent import BaseAgent
+from .q_table import QTable
 
 class SARSAAgent(BaseAgent):
     def __init__(self, actions, alpha=0.1, gamma=0.99, epsilon=0.1):
@@ -8,11 +11,13 @@ class SARSAAgent(BaseAgent):
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
-        self.q_table = {}
+        self.q_table = QTable(len(self.actions))
         self.next_action = None
+        # Pending on-policy actions per environment index, for act_batch/learn_batch
+        self.next_actions = {}
 
     def get_q_value(self, state, action):
-        return self.q_table.get((state, action), 0.0)
+        return self.q_table.get(state, action)
 
     def act(self, state):
 
@@ -25,21 +30,58 @@ class SARSAAgent(BaseAgent):
         if np.random.rand() < self.epsilon:
             return np.random.choice(self.actions)
         else:
-            q_values = [self.get_q_value(state, action) for action in self.actions]
-            return np.argmax(q_values)
+            return int(self.q_table.row_values(state).argmax())
 
-    def learn(self, state, action, reward, next_state, done):
+    def act_batch(self, states):
+        # Each environment takes the action its own last update bootstrapped from
+        actions = []
+        for i, state in enumerate(states):
+            action = self.next_actions.pop(i, None)
+            if action is None:
+                if np.random.rand() < self.epsilon:
+                    action = np.random.choice(self.actions)
+                else:
+                    action = int(self.q_table.row_values(state).argmax())
+            actions.append(action)
+        return actions
+
+    def learn(self, state, action, reward, next_state, done, discount=None):
+        self.next_action = self.update(state, action, reward, next_state, done, discount)
+
+    def learn_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        if discounts is None:
+            discounts = [None] * len(actions)
+        for i, transition in enumerate(zip(states, actions, rewards, next_states, dones, discounts)):
+            self.next_actions[i] = self.update(*transition)
+
+    def update(self, state, action, reward, next_state, done, discount=None):
+        """
+        SARSA update of (state, action) towards the on-policy action chosen
+        for next_state; returns that action.
+        """
+        # Intern both states before touching values: interning may grow (reallocate) the array
+        row = self.q_table.intern(state)
+        next_row = self.q_table.intern(next_state)
+        q_values = self.q_table.values
 
         if np.random.rand() < self.epsilon:
             next_action = np.random.choice(self.actions)
         else:
-            q_values = [self.get_q_value(next_state, a) for a in self.actions]
-            next_action = np.argmax(q_values)
-        
+            next_action = int(q_values[next_row].argmax())
 
-        self.next_action = next_action
+        current_q = q_values[row, action]
+        next_q = q_values[next_row, next_action]
+        discount = self.gamma if discount is None else discount
+        q_values[row, action] = current_q + self.alpha * (reward + discount * next_q - current_q)
+        return next_action
 
-        current_q = self.get_q_value(state, action)
-        next_q = self.get_q_value(next_state, next_action)
-        new_q = current_q + self.alpha * (reward + self.gamma * next_q - current_q)
-        self.q_table[(state, action)] = new_q
+    def save(self, path):
+        self.q_table.save(path)
+        with open(os.path.join(path, 'agent.json'), 'w') as f:
+            json.dump({'alpha': self.alpha, 'gamma': self.gamma, 'epsilon': self.epsilon}, f)
+
+    def load(self, path, mmap=True):
+        # Hyperparameters stay as constructed; only the learned table is restored
+        self.q_table = QTable.load(path, mmap=mmap)
+        self.next_action = None
+        self.next_actions = {}
@@ -0,0 +1,22 @@
+class TablePolicy:
+    """Greedy, inference-only policy over a `QTable`.
+
+    Unlike the tabular agents it never interns new states: a state the
+    table has not seen gets action 0, the argmax of an all-zero row.
+    """
+
+    def __init__(self, q_table):
+        self.q_table = q_table
+
+    @property
+    def action_size(self):
+        return self.q_table.num_actions
+
+    def act(self, state):
+        row = self.q_table.lookup(state)
+        if row is None:
+            return 0
+        return int(self.q_table.values[row].argmax())
+
+    def act_batch(self, states):
+        return [self.act(state) for state in states]
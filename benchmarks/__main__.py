@@ -0,0 +1,59 @@
+"""Benchmark suite: python -m benchmarks [--output FILE] [--baseline FILE] [--filter TEXT]"""
+import os
+import sys
+import argparse
+import tempfile
+
+# Headless: pygame draws to an in-memory display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from benchmarks import harness
+from benchmarks.cases import all_cases
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Simulation and agent benchmarks")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", default=None, help="Report to compare against; exits with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown of a case's median relative to the baseline (0.2 = 20%%)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repeats per case; the median is reported")
+    parser.add_argument("--filter", nargs="+", default=None,
+                        help="Only run cases whose name contains one of these substrings")
+    parser.add_argument("--list", action="store_true", help="List case names and exit")
+    return parser.parse_args()
+
+
+def print_result(name, result):
+    print(f"{name:<45} {result['median_s'] * 1e6:>12.1f} us/{result['unit']}")
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as log_root:
+        cases = [case for case in all_cases(log_root)
+                 if args.filter is None or any(text in case.name for text in args.filter)]
+        if args.list:
+            for case in cases:
+                print(case.name)
+            return 0
+
+        report = harness.run_cases(cases, repeat=args.repeat, progress=print_result)
+    harness.save(report, args.output)
+    print(f"Wrote {args.output}")
+
+    if args.baseline is None:
+        return 0
+    rows = harness.compare(report, harness.load(args.baseline), tolerance=args.tolerance)
+    print(f"\n{'case':<45} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for name, base, current, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<45} {base * 1e6:>10.1f}us {current * 1e6:>10.1f}us {ratio:>7.2f}{flag}")
+    regressions = [row for row in rows if row[-1]]
+    print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
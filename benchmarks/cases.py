@@ -0,0 +1,218 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pygame
+from benchmarks.harness import Case
+from display.car import Car
+from display.dashboard import Dashboard
+from env.background_logger import BackgroundLogger
+from env.metric_series import MetricSeries
+from env.recorder import CsvRecorder
+from env.trajectory_log import TrajectoryWriter
+from simulation.clock import SimulationClock
+from simulation.profiler import PhaseProfiler
+from simulation.runner import ACTIONS, MODEL_NAMES, STATE_SIZE_DQN, create_agent, create_simulation
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAR_COUNTS = (10, 100, 400)
+ENGINES = ('python', 'spatial', 'vectorized')
+STEPS_PER_REPEAT = 10
+
+
+def populate(sim, num_cars, spacing=60):
+    # One queue of moving cars per main road, all before the intersection
+    sim.all_cars = []
+    for i in range(num_cars):
+        offset = (i // 2) * spacing
+        if i % 2 == 0:
+            sim.all_cars.append(Car(offset, sim.height // 2, 40, 20, sim.red, Car.MAX_SPEED, 0))
+        else:
+            sim.all_cars.append(Car(sim.width // 2, offset, 40, 20, sim.red, 0, Car.MAX_SPEED))
+
+
+def make_sim(log_root, num_cars, engine='python', model_name='q'):
+    # Roads twice as long as the queues, so no car reaches the intersection during a repeat
+    size = 2 * 60 * (num_cars // 2 + 2)
+    sim = create_simulation(model_name, clock=SimulationClock(), width=size, height=size,
+                            log_dir=os.path.join(log_root, f"{model_name}_{engine}_{num_cars}"),
+                            vectorized=engine == 'vectorized', spatial_index=engine == 'spatial')
+    populate(sim, num_cars)
+    return sim
+
+
+def close_sim(sim):
+    sim.close()
+
+
+def env_step_cases(log_root):
+    def step(sim):
+        if sim.spatial_index is not None:
+            sim.spatial_index.rebuild(sim.all_cars)
+        sim.env.step(ACTIONS[0], sim.all_cars, sim.traffic_lights, sim.roads, sim.spatial_index)
+
+    for engine in ENGINES:
+        for num_cars in CAR_COUNTS:
+            yield Case(name=f"env_step[engine={engine},cars={num_cars}]", run=step,
+                       setup=lambda n=num_cars, e=engine: make_sim(log_root, n, e), teardown=close_sim,
+                       number=STEPS_PER_REPEAT, unit="step")
+
+
+def car_update_cases(log_root):
+    def update_all(sim):
+        for car in sim.all_cars:
+            car.update(sim.all_cars, sim.traffic_lights, sim.env.speed_reduction_distance)
+
+    for num_cars in CAR_COUNTS:
+        yield Case(name=f"car_update[cars={num_cars}]", run=update_all,
+                   setup=lambda n=num_cars: make_sim(log_root, n), teardown=close_sim,
+                   number=STEPS_PER_REPEAT, unit="tick")
+
+
+def random_state(model_name, rng):
+    if model_name == 'dqn':
+        return rng.random(STATE_SIZE_DQN).astype(np.float32).tolist()
+    # Same shape as Environment.get_hashable_state for the tabular agents
+    lights = tuple((175 + 25 * i, 200 - 25 * i, int(rng.integers(1, 3)), int(rng.integers(0, 60))) for i in range(2))
+    return (tuple(int(c) for c in rng.integers(0, 10, size=2)), lights)
+
+
+class AgentFixture:
+    def __init__(self, model_name, num_states=256, warm_transitions=1000):
+        rng = np.random.default_rng(0)
+        self.agent = create_agent(model_name)
+        self.agent.epsilon = 0  # greedy: act always evaluates the policy
+        self.states = [random_state(model_name, rng) for _ in range(num_states)]
+        self.i = 0
+        # Enough transitions that every learn call runs a full update
+        for _ in range(warm_transitions):
+            self.learn()
+
+    def act(self):
+        self.agent.act(self.states[self.i % len(self.states)])
+        self.i += 1
+
+    def learn(self):
+        n = len(self.states)
+        self.agent.learn(self.states[self.i % n], self.i % len(ACTIONS), -1.0, self.states[(self.i + 1) % n], False)
+        self.i += 1
+
+
+def agent_cases():
+    for model_name in MODEL_NAMES:
+        yield Case(name=f"agent_act[model={model_name}]", run=AgentFixture.act,
+                   setup=lambda m=model_name: AgentFixture(m, warm_transitions=0), number=1000)
+        yield Case(name=f"agent_learn[model={model_name}]", run=AgentFixture.learn,
+                   setup=lambda m=model_name: AgentFixture(m), number=200 if model_name == 'dqn' else 2000)
+
+
+class HistoryView:
+    """The attributes Dashboard reads from a simulation, filled with synthetic history."""
+
+    def __init__(self, length, rng):
+        self.collision_count = 0
+        self.waiting_time_history = MetricSeries()
+        self.collision_history = MetricSeries()
+        for value in rng.random(length).cumsum() / np.arange(1, length + 1):
+            self.waiting_time_history.append(value)
+            self.collision_history.append(self.collision_count)
+            self.collision_count += rng.random() < 0.001
+
+
+def dashboard_cases():
+    views = {}
+
+    def setup(length):
+        pygame.init()
+        screen = pygame.display.set_mode((1200, 650))
+        if length not in views:
+            rng = np.random.default_rng(0)
+            views[length] = [HistoryView(length, rng) for _ in MODEL_NAMES]
+        return screen, Dashboard(0, 400, 1200, 250, views[length], list(MODEL_NAMES.values()))
+
+    def draw(state):
+        screen, dashboard = state
+        dashboard.draw(screen)
+
+    for length in (1000, 100000):
+        yield Case(name=f"dashboard_draw[history={length}]", run=draw, setup=lambda n=length: setup(n),
+                   number=50, unit="frame")
+
+
+def logging_cases(log_root):
+    rows = [{'traffic_light_index': i, 'traffic_light_x': 175, 'traffic_light_y': 200, 'traffic_light_state': 1,
+             'cars_in_stopping_areas': 3, 'cars_at_end_areas': 0} for i in range(2)]
+    fieldnames = list(rows[0])
+    path = os.path.join(log_root, "logging")
+    os.makedirs(path, exist_ok=True)
+
+    def csv_setup():
+        return CsvRecorder(os.path.join(path, "data.csv"), fieldnames)
+
+    def background_setup():
+        return BackgroundLogger(), CsvRecorder(os.path.join(path, "data_bg.csv"), fieldnames)
+
+    def background_teardown(state):
+        logger, recorder = state
+        logger.close_recorder(recorder)
+        logger.close()
+
+    def trajectory_setup():
+        return TrajectoryWriter(os.path.join(path, "trajectory"), 2, 2)
+
+    state = {'traffic_lights': [(175, 200, 1, 3.0), (200, 175, 2, 1.0)],
+             'cars_in_stopping_areas': [3, 0], 'cars_at_end_areas': [0, 1]}
+
+    def trajectory_append(writer):
+        writer.append(0, 0, 1, -1.0, False, state)
+
+    yield Case(name="logging[csv]", run=lambda recorder: recorder.write_rows(rows), setup=csv_setup,
+               teardown=lambda recorder: recorder.close(), number=2000, unit="tick")
+    yield Case(name="logging[background]", run=lambda state: state[0].write(state[1], rows), setup=background_setup,
+               teardown=background_teardown, number=2000, unit="tick")
+    yield Case(name="logging[trajectory]", run=trajectory_append, setup=trajectory_setup,
+               teardown=lambda writer: writer.close(), number=2000, unit="tick")
+
+
+def sim_update_cases(log_root):
+    # End to end: one full TrafficSimulation.update (spawn, act, step, learn, statistics) per tick
+    def setup(model_name, profile=False):
+        clock = SimulationClock()
+        sim = create_simulation(model_name, clock=clock, log_dir=os.path.join(log_root, f"sim_{model_name}"),
+                                profiler=PhaseProfiler() if profile else None)
+        for _ in range(200):
+            sim.update(clock.tick())
+        return sim, clock
+
+    def tick(state):
+        sim, clock = state
+        sim.update(clock.tick())
+
+    for model_name in MODEL_NAMES:
+        yield Case(name=f"sim_update[model={model_name}]", run=tick, setup=lambda m=model_name: setup(m),
+                   teardown=lambda state: state[0].close(), number=500, unit="tick")
+    # Overhead of the phase profiler when enabled
+    yield Case(name="sim_update[model=q,profile]", run=tick, setup=lambda: setup('q', profile=True),
+               teardown=lambda state: state[0].close(), number=500, unit="tick")
+
+
+def startup_cases():
+    # Wall time of a fresh interpreter: imports plus creating one agent (torch is only imported for DQN)
+    programs = {
+        "import=main": "import main",
+        "agent=q": "from simulation.runner import create_agent; create_agent('q')",
+        "agent=sarsa": "from simulation.runner import create_agent; create_agent('sarsa')",
+        "agent=dqn": "from simulation.runner import create_agent; create_agent('dqn')",
+    }
+
+    def start(code):
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL)
+
+    for name, code in programs.items():
+        yield Case(name=f"startup[{name}]", run=lambda state, c=code: start(c), unit="process")
+
+
+def all_cases(log_root):
+    for factory in (env_step_cases(log_root), car_update_cases(log_root), agent_cases(), dashboard_cases(),
+                    logging_cases(log_root), sim_update_cases(log_root), startup_cases()):
+        yield from factory
@@ -0,0 +1,96 @@
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+
+class Case:
+    """One benchmark.
+
+    Each repeat calls `setup()` (untimed), times `number` calls of
+    `run(state)` on its result, then calls `teardown(state)` (untimed).
+    Results are seconds per `unit`, i.e. per `run` call.
+    """
+
+    def __init__(self, name, run, setup=None, teardown=None, number=1, unit="call"):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+        self.number = number
+        self.unit = unit
+
+
+def measure(case, repeat=5):
+    times = []
+    for _ in range(repeat):
+        state = case.setup() if case.setup is not None else None
+        start = time.perf_counter()
+        for _ in range(case.number):
+            case.run(state)
+        times.append((time.perf_counter() - start) / case.number)
+        if case.teardown is not None:
+            case.teardown(state)
+    return {
+        'unit': case.unit,
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'mean_s': statistics.fmean(times),
+        'repeat': repeat,
+        'number': case.number,
+    }
+
+
+def environment_info():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    for module in ('numpy', 'torch', 'pygame'):
+        if module in sys.modules:
+            info[module] = getattr(sys.modules[module], '__version__', None)
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                        check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def run_cases(cases, repeat=5, progress=None):
+    results = {}
+    for case in cases:
+        results[case.name] = measure(case, repeat=repeat)
+        if progress is not None:
+            progress(case.name, results[case.name])
+    return {'environment': environment_info(), 'results': results}
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compare medians against a baseline report. Returns rows of
+    (name, baseline seconds, current seconds, ratio, regressed); a case
+    regresses when it is more than `tolerance` slower than the baseline.
+    """
+    rows = []
+    for name, result in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        ratio = result['median_s'] / base['median_s']
+        rows.append((name, base['median_s'], result['median_s'], ratio, ratio > 1 + tolerance))
+    return rows
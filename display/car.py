@@ -3,6 +3,7 @@ import datetime
 import csv
 import os
 from display.traffic_light import Light
+from display.car_sprites import car_sprites
 
 class Car:
     MAX_SPEED = 25
@@ -35,11 +36,8 @@ class Car:
             self.rotation = 0
 
     def draw(self, surface):
-        car_surface = pygame.Surface((self.original_width, self.original_height))
-        car_surface.fill(self.color)
-        
-
-        rotated_surface = pygame.transform.rotate(car_surface, self.rotation)
+        # Single-car path; TrafficSimulation.draw blits all cars at once via car_sprites.draw
+        rotated_surface = car_sprites.sprite_for(self)
         rect = rotated_surface.get_rect(center=(self.x + self.width / 2, self.y + self.height / 2))
         
         surface.blit(rotated_surface, rect.topleft)
@@ -114,12 +112,16 @@ class Car:
         self.speed_x = self.original_speed_x
         self.speed_y = self.original_speed_y
 
-    def update(self, all_cars, traffic_lights, speed_reduction_distance):
+    def update(self, all_cars, traffic_lights, speed_reduction_distance, spatial_index=None):
 
 
         self.stop_if_red_lights(traffic_lights)
 
-        car_in_proximity = self.get_car_in_proximity(all_cars, speed_reduction_distance)
+        if spatial_index is not None:
+            leader_candidates = spatial_index.leader_candidates(self, speed_reduction_distance)
+        else:
+            leader_candidates = all_cars
+        car_in_proximity = self.get_car_in_proximity(leader_candidates, speed_reduction_distance)
 
         # Adjust speeds based on proximity
         if car_in_proximity:
@@ -134,7 +136,11 @@ class Car:
             self.stop_if_red_lights(traffic_lights)
 
 
-        for other_car in all_cars:
+        if spatial_index is not None:
+            collision_candidates = spatial_index.nearby(self.x, self.y, self.width, self.height)
+        else:
+            collision_candidates = all_cars
+        for other_car in collision_candidates:
             if self != other_car and self.check_collision(other_car):
                 self.crashed = True
                 other_car.crashed = True
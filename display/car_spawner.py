@@ -10,7 +10,7 @@ class CarSpawner:
         self.direction = direction
         self.time_since_last_spawn = 0
 
-    def spawn_car(self, current_time, all_cars):
+    def spawn_car(self, current_time, all_cars, spatial_index=None):
         if current_time - self.time_since_last_spawn >= self.spawn_interval:
             x = random.randint(self.spawn_area[0], self.spawn_area[1])
             y = self.spawn_area[2]
@@ -18,9 +18,15 @@ class CarSpawner:
             speed_y = random.randint(Car.MIN_SPEED, Car.MAX_SPEED) * self.direction[1]
 
             # Check for collision with existing cars
-            collision = any(car.check_spawn_point_collision(x, y, self.car_size[0], self.car_size[1]) for car in all_cars)
+            if spatial_index is not None:
+                nearby_cars = spatial_index.nearby(x, y, self.car_size[0], self.car_size[1], margin=15)
+            else:
+                nearby_cars = all_cars
+            collision = any(car.check_spawn_point_collision(x, y, self.car_size[0], self.car_size[1]) for car in nearby_cars)
             if not collision:
                 car = Car(x, y, *self.car_size, self.car_color, speed_x, speed_y)
                 all_cars.append(car)
+                if spatial_index is not None:
+                    spatial_index.add(car)
                 self.time_since_last_spawn = current_time
                 self.spawn_interval = random.random() * 500 + 200
\ No newline at end of file
@@ -0,0 +1,45 @@
+import pygame
+
+
+class CarSprites:
+    """Rotated car surfaces cached by (width, height, colour, rotation).
+
+    Cars only come in a few sizes, colours and four headings, so each
+    sprite is built once instead of on every frame. A sprite built before
+    the display exists is converted to its pixel format on first use after. `draw` blits all cars
+    with a single `Surface.blits` call and returns the rects it touched.
+    """
+
+    def __init__(self):
+        self.cache = {}
+        # Keys of sprites built before a display existed; converted once one does
+        self.unconverted = set()
+
+    def get(self, width, height, color, rotation):
+        key = (width, height, color, rotation)
+        sprite = self.cache.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((width, height))
+            sprite.fill(color)
+            sprite = pygame.transform.rotate(sprite, rotation)
+            self.cache[key] = sprite
+            self.unconverted.add(key)
+        if self.unconverted and key in self.unconverted and pygame.display.get_surface() is not None:
+            # Match the display's pixel format so blits need no conversion
+            sprite = self.cache[key] = sprite.convert()
+            self.unconverted.discard(key)
+        return sprite
+
+    def sprite_for(self, car):
+        return self.get(car.original_width, car.original_height, tuple(car.color), car.rotation)
+
+    def draw(self, surface, cars):
+        blits = []
+        for car in cars:
+            sprite = self.sprite_for(car)
+            blits.append((sprite, sprite.get_rect(center=(car.x + car.width / 2, car.y + car.height / 2))))
+        return surface.blits(blits)
+
+
+# Shared by every simulation and view, so each sprite exists once per process
+car_sprites = CarSprites()
@@ -1,12 +1,14 @@
+import numpy as np
 import pygame
 
 class Dashboard:
-    def __init__(self, x, y, width, height, sims, model_names):
+    def __init__(self, x, y, width, height, sims, model_names, profilers=None):
         self.rect = pygame.Rect(x, y, width, height)
         self.sims = sims
         self.model_names = model_names
         self.font = pygame.font.Font(None, 24)
         self.title_font = pygame.font.Font(None, 32)
+        self.small_font = pygame.font.Font(None, 18)
         
         # Colors for graph lines corresponding to models if needed, or just distinct colors
         self.graph_colors = [
@@ -14,25 +16,48 @@ class Dashboard:
             (100, 255, 100), # Greenish (Model 2)
             (100, 100, 255)  # Blueish (Model 3)
         ]
+        # Optional PhaseProfiler per sim; its slowest phases are listed next to the stats
+        self.profilers = profilers
+        self.profile_lines = None
+        self.frame = 0
+        self.profile_refresh = 30  # frames between percentile recomputations
         self.bg_color = (30, 30, 30)
         self.axis_color = (200, 200, 200)
 
+        # Static chrome (background, model names, graph frames and titles) is rendered once
+        self.background = None
+        # Rendered text per label slot, re-rendered only when its text changes
+        self.text_cache = {}
+
+        # Graph Dimensions
+        graph_width = (self.rect.width - 60) // 2  # Split width for 2 graphs, with padding
+        graph_height = self.rect.height - 110
+        graph_y = self.rect.y + 100
+        g1_x = self.rect.x + 20
+        g2_x = g1_x + graph_width + 20
+        self.graphs = [
+            # --- Graph 1: Average Waiting Time ---
+            (pygame.Rect(g1_x, graph_y, graph_width, graph_height), "Avg Waiting Time (s)",
+             lambda sim: sim.waiting_time_history, 'avg'),
+            # --- Graph 2: Cumulative Crashes ---
+            (pygame.Rect(g2_x, graph_y, graph_width, graph_height), "Cumulative Crashes",
+             lambda sim: sim.collision_history, 'max'),
+        ]
+
     def draw(self, surface):
-        # Draw Dashboard Background
-        pygame.draw.rect(surface, self.bg_color, self.rect)
+        """Draw the dashboard and return its rect (the region that changed)."""
+        if self.background is None:
+            self.background = self._render_background(surface)
+        surface.blit(self.background, self.rect.topleft)
         
-        # Draw Section Titles/Stats
+        # Draw Section Stats
         section_width = self.rect.width // len(self.sims)
         
-        for i, (sim, name) in enumerate(zip(self.sims, self.model_names)):
+        for i, sim in enumerate(self.sims):
             section_x = self.rect.x + i * section_width
             
-            # Draw Model Name
-            name_text = self.title_font.render(name, True, self.graph_colors[i])
-            surface.blit(name_text, (section_x + 10, self.rect.y + 10))
-            
             # Draw Collision Count
-            col_text = self.font.render(f"Crashes: {sim.collision_count}", True, (255, 255, 255))
+            col_text = self._text(('crashes', i), self.font, f"Crashes: {sim.collision_count}", (255, 255, 255))
             surface.blit(col_text, (section_x + 10, self.rect.y + 40))
             
             # Draw Current Avg Wait
@@ -40,40 +65,74 @@ class Dashboard:
                 curr_wait = sim.waiting_time_history[-1]
             else:
                 curr_wait = 0
-            wait_text = self.font.render(f"Avg Wait: {curr_wait:.1f}s", True, (255, 255, 255))
+            wait_text = self._text(('wait', i), self.font, f"Avg Wait: {curr_wait:.1f}s", (255, 255, 255))
             surface.blit(wait_text, (section_x + 10, self.rect.y + 65))
 
-        # Graph Dimensions
-        graph_width = (self.rect.width - 60) // 2  # Split width for 2 graphs, with padding
-        graph_height = self.rect.height - 110
-        graph_y = self.rect.y + 100
-        
-        # --- Graph 1: Average Waiting Time ---
-        g1_x = self.rect.x + 20
-        self._draw_graph(surface, g1_x, graph_y, graph_width, graph_height, "Avg Waiting Time (s)", 
-                         lambda sim: sim.waiting_time_history, method='avg')
+        if self.profilers is not None:
+            self._draw_profile(surface, section_width)
 
-        # --- Graph 2: Cumulative Crashes ---
-        g2_x = g1_x + graph_width + 20
-        self._draw_graph(surface, g2_x, graph_y, graph_width, graph_height, "Cumulative Crashes", 
-                         lambda sim: sim.collision_history, method='max')
-
-    def _draw_graph(self, surface, x, y, w, h, title, data_extractor, method='avg'):
-        # Background
-        pygame.draw.rect(surface, (0, 0, 0), (x, y, w, h))
-        pygame.draw.line(surface, self.axis_color, (x, y + h), (x + w, y + h), 2) # X Axis
-        pygame.draw.line(surface, self.axis_color, (x, y), (x, y + h), 2) # Y Axis
-        
-        # Title
-        title_surf = self.font.render(title, True, (200, 200, 200))
-        surface.blit(title_surf, (x, y - 20))
+        for graph_rect, _, data_extractor, method in self.graphs:
+            self._draw_graph_lines(surface, *graph_rect, data_extractor, method=method)
+        return self.rect
+
+    def _draw_profile(self, surface, section_width):
+        if self.profile_lines is None or self.frame % self.profile_refresh == 0:
+            self.profile_lines = [self._profile_lines(profiler) for profiler in self.profilers]
+        self.frame += 1
+
+        for i, lines in enumerate(self.profile_lines):
+            for j, line in enumerate(lines):
+                text = self._text(('profile', i, j), self.small_font, line, (180, 180, 180))
+                surface.blit(text, (self.rect.x + i * section_width + 190, self.rect.y + 12 + j * 15))
 
+    def _profile_lines(self, profiler, num_phases=3):
+        # Whole tick, then the phases with the highest mean, as p50/p95 in ms
+        stats = profiler.stats()
+        if 'tick' not in stats:
+            return []
+        phases = sorted((phase for phase in stats if phase != 'tick'), key=lambda phase: -stats[phase]['mean_ms'])
+        return [f"{phase}: {stats[phase]['p50_ms']:.2f}/{stats[phase]['p95_ms']:.2f} ms"
+                for phase in ['tick'] + phases[:num_phases]]
+
+    def _render_background(self, surface):
+        background = pygame.Surface(self.rect.size).convert(surface)
+        offset = (-self.rect.x, -self.rect.y)
+
+        # Draw Dashboard Background
+        background.fill(self.bg_color)
+
+        # Draw Section Titles
+        section_width = self.rect.width // len(self.sims)
+        for i, name in enumerate(self.model_names):
+            name_text = self.title_font.render(name, True, self.graph_colors[i])
+            background.blit(name_text, (i * section_width + 10, 10))
+
+        for graph_rect, title, _, _ in self.graphs:
+            x, y, w, h = graph_rect.move(offset)
+            # Background
+            pygame.draw.rect(background, (0, 0, 0), (x, y, w, h))
+            pygame.draw.line(background, self.axis_color, (x, y + h), (x + w, y + h), 2) # X Axis
+            pygame.draw.line(background, self.axis_color, (x, y), (x, y + h), 2) # Y Axis
+            
+            # Title
+            title_surf = self.font.render(title, True, (200, 200, 200))
+            background.blit(title_surf, (x, y - 20))
+        return background
+
+    def _text(self, key, font, text, color):
+        cached = self.text_cache.get(key)
+        if cached is None or cached[0] != text:
+            cached = (text, font.render(text, True, color))
+            self.text_cache[key] = cached
+        return cached[1]
+
+    def _draw_graph_lines(self, surface, x, y, w, h, data_extractor, method='avg'):
         # Determine Scale
         max_val = 1
         for sim in self.sims:
             history = data_extractor(sim)
             if history:
-                max_val = max(max_val, max(history))
+                max_val = max(max_val, history.max())
         
         max_val *= 1.1 # Padding
         
@@ -83,49 +142,14 @@ class Dashboard:
             if len(raw_history) < 2:
                 continue
                 
-            # Adaptive Downsampling
-            # We want roughly 1 point per pixel of width to maintain detail but avoid overcrowding
-            # However, 'w' might be large, so let's cap it reasonably, e.g., w/2 or w
+            # Roughly 1 point per pixel of width, read from the history's pre-aggregated levels
             target_points = int(w) 
-            history = self._downsample_data(raw_history, target_points, method=method)
+            history = raw_history.downsample(target_points, method=method)
 
-            points = []
             num_points = len(history)
-            
-            step_x = w / (num_points - 1) if num_points > 1 else 0
-            
-            for j, val in enumerate(history):
-                px = x + j * step_x
-                py = y + h - (val / (max_val if max_val > 0 else 1) * h)
-                points.append((px, py))
+            px = x + np.arange(num_points) * (w / (num_points - 1) if num_points > 1 else 0)
+            py = y + h - history / (max_val if max_val > 0 else 1) * h
+            points = np.column_stack((px, py)).tolist()
             
             if len(points) > 1:
                 pygame.draw.lines(surface, self.graph_colors[i], False, points, 2)
-
-    def _downsample_data(self, data, max_points, method='avg'):
-        if not data:
-            return []
-        if len(data) <= max_points:
-            return data
-        
-        chunk_size = len(data) / max_points
-        downsampled = []
-        
-        for i in range(max_points):
-            start_index = int(i * chunk_size)
-            end_index = int((i + 1) * chunk_size)
-            chunk = data[start_index : end_index]
-            
-            if not chunk: # Should not happen mathematically but safe check
-                continue
-                
-            if method == 'avg':
-                val = sum(chunk) / len(chunk)
-            elif method == 'max':
-                val = max(chunk) # Useful for cumulative or peak detection
-            else:
-                val = chunk[-1] # Valid for cumulative counters
-            
-            downsampled.append(val)
-            
-        return downsampled
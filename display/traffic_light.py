@@ -1,5 +1,6 @@
 import pygame
 from display.road import Road
+from simulation.clock import PygameClock
 from enum import Enum
 
 class Light(Enum):
@@ -7,12 +8,13 @@ class Light(Enum):
     GREEN = 2
 
 class TrafficLight:
-    def __init__(self, location_x, location_y, road: Road) -> None:
+    def __init__(self, location_x, location_y, road: Road, clock=None) -> None:
         self.location_x = location_x
         self.location_y = location_y
         self.road = road
         self.current_light = Light.RED
-        self.last_light_change_time = pygame.time.get_ticks()
+        self.clock = clock if clock is not None else PygameClock()
+        self.last_light_change_time = self.clock.get_ticks()
 
     def draw(self, surface):
 
@@ -22,7 +24,7 @@ class TrafficLight:
             Light.GREEN: (0, 255, 0),
         }
         
-        pygame.draw.circle(surface, light_color_map[self.current_light], (self.location_x, self.location_y), circle_radius)
+        return pygame.draw.circle(surface, light_color_map[self.current_light], (self.location_x, self.location_y), circle_radius)
 
     def change_light(self, light: Light):
         self.current_light = light
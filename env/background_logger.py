@@ -0,0 +1,89 @@
+import queue
+import threading
+
+
+class BackgroundLogger:
+    """Moves CSV writes off the simulation loop onto a writer thread.
+
+    Rows are handed over through a bounded queue. The writer thread drains
+    up to `batch_size` queued items per wake-up and merges the rows of each
+    recorder into a single write. When the queue is full, `write` blocks
+    until the writer catches up (backpressure) instead of dropping rows or
+    growing without bound. `close()` drains everything that was queued and
+    stops the thread.
+    """
+
+    def __init__(self, max_queue=4096, batch_size=256):
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.error = None
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="BackgroundLogger", daemon=True)
+        self.thread.start()
+
+    def write(self, recorder, rows):
+        self._put(('write', recorder, rows))
+
+    def flush(self, recorder):
+        self._put(('flush', recorder, None))
+
+    def close_recorder(self, recorder):
+        self._put(('close', recorder, None))
+
+    def reset_recorder(self, recorder):
+        self._put(('reset', recorder, None))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        self._raise_error()
+
+    def _put(self, item):
+        self._raise_error()
+        if self.closed:
+            raise RuntimeError("BackgroundLogger is closed")
+        self.queue.put(item)
+
+    def _raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending = {}
+            for item in batch:
+                if item is None:
+                    running = False
+                    break
+                command, recorder, rows = item
+                if command == 'write':
+                    pending.setdefault(recorder, []).extend(rows)
+                    continue
+                # Keep ordering: pending rows go out before a flush/close/reset of the same recorder
+                self._write(recorder, pending.pop(recorder, None))
+                self._call(getattr(recorder, command))
+            for recorder, rows in pending.items():
+                self._write(recorder, rows)
+
+    def _write(self, recorder, rows):
+        if rows:
+            self._call(recorder.write_rows, rows)
+
+    def _call(self, func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            if self.error is None:
+                self.error = e
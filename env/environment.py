@@ -1,19 +1,28 @@
 import datetime
-import pygame
 import numpy as np
-import csv
 import os
+from simulation.clock import PygameClock
+from env.recorder import CsvRecorder
 
 class Environment:
 
     dif_penalty_for_wait = True
+    # Below this many cars the plain loop in count_cars beats the NumPy pass
+    vectorized_count_min_cars = 64
     episode = 0
     episode_reward = 0
-    
-
-
-    def __init__(self, log_dir='.', crash_penalty=1000, stopping_penalty=0.05, state_encoding='tuple', min_switch_time=5000):
-        self.data = []
+    data_fieldnames = [
+        'traffic_light_index',
+        'traffic_light_x',
+        'traffic_light_y',
+        'traffic_light_state',
+        'cars_in_stopping_areas',
+        'cars_at_end_areas'
+    ]
+
+
+    def __init__(self, log_dir='.', crash_penalty=1000, stopping_penalty=0.05, state_encoding='tuple', min_switch_time=5000, clock=None, car_engine=None, logger=None,
+                 profiler=None, include_cars=False):
         self.state = None
         self.speed_reduction_distance = 100
         self.light_change_interval = 5000
@@ -22,49 +31,131 @@ class Environment:
         self.crash_penalty = crash_penalty
         self.stopping_penalty = stopping_penalty
         self.state_encoding = state_encoding
+        self.clock = clock if clock is not None else PygameClock()
+        # Optional batched replacement for the per-car update loop (e.g. VectorizedCarEngine)
+        self.car_engine = car_engine
+        # Optional BackgroundLogger; without one, CSV rows are written on the calling thread
+        self.logger = logger
+        # Optional PhaseProfiler; step() laps its phases when set
+        self.profiler = profiler
+        # Whether states carry the per-car (x, y, speed_x, speed_y, crashed) list; nothing in the loop needs it
+        self.include_cars = include_cars
+        self.data_recorder = CsvRecorder(os.path.join(log_dir, 'data.csv'), self.data_fieldnames)
+        self.rewards_recorder = CsvRecorder(os.path.join(log_dir, 'rewards.csv'), ['timestamp', 'reward'], mode='a')
 
     def reset(self, all_cars, traffic_lights, roads):
-        self.data = []
+        # Start a fresh data.csv on the next recorded state
+        if self.logger is not None:
+            self.logger.reset_recorder(self.data_recorder)
+        else:
+            self.data_recorder.reset()
         self.state = self.get_state(all_cars, traffic_lights, roads)
         return self.state
 
-    def get_state(self, all_cars, traffic_lights, roads):
-        cars_state = [(car.x, car.y, car.speed_x, car.speed_y, car.crashed) for car in all_cars]
-        
-        current_time = pygame.time.get_ticks()
+    def get_state(self, all_cars, traffic_lights, roads, include_cars=None, car_engine=None):
+        """
+        Light states plus per-main-road queue and exit counts and the number
+        of crashed cars, from a single pass over the cars (a NumPy pass over
+        `car_engine`'s arrays when it has just updated them). The per-car
+        list under 'cars' is only built with `include_cars`.
+        """
+        current_time = self.clock.get_ticks()
         lights_state = []
         for light in traffic_lights:
             state_val = (light.current_light.value if hasattr(light.current_light, 'value') else light.current_light)
             time_since_change = (current_time - light.last_light_change_time) / 1000.0 # In seconds
             lights_state.append((light.location_x, light.location_y, state_val, time_since_change))
-            
-        cars_in_stopping_areas = self.count_cars_in_stopping_areas(all_cars, roads)
-        cars_at_end_areas = self.count_cars_at_end_areas(all_cars, roads)
 
-        return {
-            'cars': cars_state, 
+        main_roads = [road for road in roads if road.main_road]
+        if car_engine is not None and len(all_cars) >= self.vectorized_count_min_cars and car_engine.size == len(all_cars):
+            cars_in_stopping_areas, cars_at_end_areas, num_crashed = self.count_cars_vectorized(car_engine, all_cars, main_roads)
+        else:
+            cars_in_stopping_areas, cars_at_end_areas, num_crashed = self.count_cars(all_cars, main_roads)
+
+        state = {
             'traffic_lights': lights_state, 
             'cars_in_stopping_areas': cars_in_stopping_areas,
-            'cars_at_end_areas': cars_at_end_areas
+            'cars_at_end_areas': cars_at_end_areas,
+            'num_crashed': num_crashed
         }
-
-    def step(self, action, all_cars, traffic_lights, roads):
-        self.apply_action(action, traffic_lights)
+        if include_cars if include_cars is not None else self.include_cars:
+            state['cars'] = [(car.x, car.y, car.speed_x, car.speed_y, car.crashed) for car in all_cars]
+        return state
+
+    def count_cars(self, all_cars, main_roads):
+        # Fused Road.count_cars / Road.count_cars_at_end over every main road, plus the crash count
+        stopping_areas = [road.stopping_area for road in main_roads]
+        end_areas = [road.end_area for road in main_roads]
+        cars_in_stopping_areas = [0] * len(main_roads)
+        cars_at_end_areas = [0] * len(main_roads)
+        count_waiting = Environment.dif_penalty_for_wait
+        num_crashed = 0
 
         for car in all_cars:
+            center_x = car.x + car.width / 2
+            center_y = car.y + car.height / 2
+            if car.speed_x == 0 and car.speed_y == 0:
+                for i, (x0, y0, x1, y1) in enumerate(stopping_areas):
+                    if x0 <= center_x <= x1 and y0 <= center_y <= y1:
+                        cars_in_stopping_areas[i] += car.waiting_duration + 1 if count_waiting else 1
+            for i, (x0, y0, x1, y1) in enumerate(end_areas):
+                if x0 <= center_x <= x1 and y0 <= center_y <= y1:
+                    car.reached_end = True
+                    cars_at_end_areas[i] += 1
+            if car.crashed:
+                num_crashed += 1
+        return cars_in_stopping_areas, cars_at_end_areas, num_crashed
+
+    def count_cars_vectorized(self, engine, all_cars, main_roads):
+        # Same as count_cars, on the arrays VectorizedCarEngine left after its update
+        center_x = engine.x + engine.width / 2
+        center_y = engine.y + engine.height / 2
+        stopped = (engine.speed_x == 0) & (engine.speed_y == 0)
+        weight = engine.waiting_duration + 1 if Environment.dif_penalty_for_wait else np.ones(engine.size, dtype=np.int64)
+
+        def inside(area):
+            x0, y0, x1, y1 = area
+            return (x0 <= center_x) & (center_x <= x1) & (y0 <= center_y) & (center_y <= y1)
+
+        cars_in_stopping_areas = [int(weight[stopped & inside(road.stopping_area)].sum()) for road in main_roads]
+        cars_at_end_areas = []
+        for road in main_roads:
+            at_end = inside(road.end_area)
+            for i in np.flatnonzero(at_end).tolist():
+                all_cars[i].reached_end = True
+            cars_at_end_areas.append(int(at_end.sum()))
+        return cars_in_stopping_areas, cars_at_end_areas, int(engine.crashed.sum())
+
+    def step(self, action, all_cars, traffic_lights, roads, spatial_index=None):
+        profiler = self.profiler
+        self.apply_action(action, traffic_lights)
+        if profiler is not None:
+            profiler.lap('env.actions')
 
-            car.update(all_cars, traffic_lights, self.speed_reduction_distance)
-
-        new_state = self.get_state(all_cars, traffic_lights, roads)
+        if self.car_engine is not None:
+            self.car_engine.update(all_cars, traffic_lights, self.speed_reduction_distance)
+        else:
+            for car in all_cars:
+                car.update(all_cars, traffic_lights, self.speed_reduction_distance, spatial_index)
+        if profiler is not None:
+            profiler.lap('env.cars')
+
+        new_state = self.get_state(all_cars, traffic_lights, roads, car_engine=self.car_engine)
+        if profiler is not None:
+            profiler.lap('env.state')
         reward = self.calculate_reward(new_state)
         done = self.is_done(new_state)
+        if profiler is not None:
+            profiler.lap('env.reward')
 
         self.record_data(new_state)
+        if profiler is not None:
+            profiler.lap('env.logging')
 
         return new_state, reward, done
 
     def apply_action(self, action, traffic_lights):
-        current_time = pygame.time.get_ticks()
+        current_time = self.clock.get_ticks()
         for i, light in enumerate(traffic_lights):
 
             if light.current_light != action[i]:
@@ -78,9 +169,7 @@ class Environment:
         reward -= sum(state['cars_in_stopping_areas']) * self.stopping_penalty
         
         # Penalize crashes
-        for car in state['cars']:
-            if car[4]:  # If crashed
-                reward -= self.crash_penalty
+        reward -= state['num_crashed'] * self.crash_penalty
 
         
         light_states = [light[2] for light in state['traffic_lights']]
@@ -96,72 +185,54 @@ class Environment:
         Environment.episode += 1
         Environment.episode_reward += reward
         if (Environment.episode == 50):
-            with open(os.path.join(self.log_dir, 'rewards.csv'), 'a', newline='') as csvfile:
-                fieldnames = ['timestamp', 'reward']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                if csvfile.tell() == 0:  # Write header if file is empty
-                    writer.writeheader()
-
-                writer.writerow({
-                    'timestamp': datetime.datetime.now(),
-                    'reward': Environment.episode_reward
-                })
+            self.write_rows(self.rewards_recorder, [{
+                'timestamp': datetime.datetime.now(),
+                'reward': Environment.episode_reward
+            }])
             Environment.episode = 0
             Environment.episode_reward = 0
         return reward
 
     def is_done(self, state):
-        for car in state['cars']:
-            if car[4]:
-                return True
-        return False
-
-    def count_cars_in_stopping_areas(self, all_cars, roads):
-        counts = []
-        for road in filter(lambda r: r.main_road, roads):
-            count = road.count_cars(all_cars, calculate_waiting_durations=Environment.dif_penalty_for_wait)
-            counts.append(count)
-        return counts
-
-    def count_cars_at_end_areas(self, all_cars, roads):
-        counts = []
-        for road in filter(lambda r: r.main_road, roads):
-            count = road.count_cars_at_end(all_cars)
-            counts.append(count)
-        return counts
+        return state['num_crashed'] > 0
 
     def record_data(self, state):
-        self.data.append(state)
-        self.save_data_to_csv(os.path.join(self.log_dir, 'data.csv'))
-
-    def save_data_to_csv(self, filename):
-        with open(filename, 'w', newline='') as csvfile:
-            fieldnames = [
-                'traffic_light_index', 
-                'traffic_light_x', 
-                'traffic_light_y', 
-                'traffic_light_state',
-                'cars_in_stopping_areas',
-                'cars_at_end_areas'
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-            writer.writeheader()
-            for state in self.data:
-                for i, light in enumerate(state['traffic_lights']):
-                    writer.writerow({
-                        'traffic_light_index': i,
-                        'traffic_light_x': light[0],
-                        'traffic_light_y': light[1],
-                        'traffic_light_state': light[2],
-                        'cars_in_stopping_areas': state['cars_in_stopping_areas'][i],
-                        'cars_at_end_areas': state['cars_at_end_areas'][i]
-                    })
-
-    def clear_data(self):
-        self.data = []
-      
+        # Stream only the new rows; states are not kept once written
+        self.write_rows(self.data_recorder, self.data_rows(state))
+
+    def write_rows(self, recorder, rows):
+        if self.logger is not None:
+            self.logger.write(recorder, rows)
+        else:
+            recorder.write_rows(rows)
+
+    def data_rows(self, state):
+        rows = []
+        for i, light in enumerate(state['traffic_lights']):
+            rows.append({
+                'traffic_light_index': i,
+                'traffic_light_x': light[0],
+                'traffic_light_y': light[1],
+                'traffic_light_state': light[2],
+                'cars_in_stopping_areas': state['cars_in_stopping_areas'][i],
+                'cars_at_end_areas': state['cars_at_end_areas'][i]
+            })
+        return rows
+
+    def flush(self):
+        for recorder in (self.data_recorder, self.rewards_recorder):
+            if self.logger is not None:
+                self.logger.flush(recorder)
+            else:
+                recorder.flush()
+
+    def close(self):
+        for recorder in (self.data_recorder, self.rewards_recorder):
+            if self.logger is not None:
+                self.logger.close_recorder(recorder)
+            else:
+                recorder.close()
+
     def get_hashable_state(self, state):
         cars_in_stopping_areas = state['cars_in_stopping_areas']
         
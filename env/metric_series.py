@@ -0,0 +1,173 @@
+import os
+import numpy as np
+
+
+class _Column:
+    """Append-only rows of `width` float64 values.
+
+    Rows live in a growable array, or with `path` in a fixed chunk that is
+    appended to the file whenever it fills up; spilled rows are read back
+    through a memory map.
+    """
+
+    def __init__(self, width, path=None, chunk_size=4096):
+        self.width = width
+        self.path = path
+        self.file = open(path, 'wb') if path else None
+        self.buffer = np.empty((chunk_size, width))
+        self.size = 0
+        self.on_disk = 0
+        self.map = None
+
+    def append(self, row):
+        i = self.size - self.on_disk
+        if i == len(self.buffer):
+            if self.file is None:
+                grown = np.empty((2 * len(self.buffer), self.width))
+                grown[:i] = self.buffer
+                self.buffer = grown
+            else:
+                self.file.write(self.buffer.tobytes())
+                self.file.flush()
+                self.on_disk += i
+                i = 0
+        self.buffer[i] = row
+        self.size += 1
+
+    def rows(self, start, stop):
+        if start >= self.on_disk:
+            return self.buffer[start - self.on_disk:stop - self.on_disk]
+        if self.map is None or len(self.map) != self.on_disk:
+            self.map = np.memmap(self.path, dtype=np.float64, mode='r', shape=(self.on_disk, self.width))
+        spilled = self.map[start:min(stop, self.on_disk)]
+        if stop <= self.on_disk:
+            return spilled
+        return np.concatenate([spilled, self.buffer[:stop - self.on_disk]])
+
+    def close(self):
+        self.map = None
+        if self.file is not None:
+            # Leave the complete column on disk
+            self.file.write(self.buffer[:self.size - self.on_disk].tobytes())
+            self.file.close()
+            self.file = None
+
+
+class MetricSeries:
+    """Per-tick metric history with a min/max/sum pyramid for cheap plotting.
+
+    Level 0 holds the raw samples; each bucket of level k + 1 aggregates
+    `fanout` buckets of level k. `downsample` reads the coarsest level that
+    still has a bucket per output point, so a redraw costs
+    O(fanout * max_points) however long the run. Without `spill_dir`, level
+    0 keeps every raw sample in memory, so memory still grows linearly with
+    the run. With `spill_dir`, every level is spilled to
+    `spill_dir/level<k>.bin` in chunks and memory use stays constant.
+
+    Supports `len`, indexing and truthiness like the list it replaces.
+    """
+
+    def __init__(self, spill_dir=None, fanout=4, chunk_size=4096):
+        self.spill_dir = spill_dir
+        self.fanout = fanout
+        self.chunk_size = chunk_size
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.levels = [self._new_level(0)]
+        self.count = 0
+        self.max_value = None
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("MetricSeries index out of range")
+        return float(self.levels[0].rows(index, index + 1)[0, 0])
+
+    def max(self):
+        return self.max_value
+
+    def append(self, value):
+        value = float(value)
+        self.levels[0].append(value)
+        self.count += 1
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+
+        # Every `fanout` buckets completed at one level complete a bucket one level up
+        level, buckets = 0, self.count
+        while buckets % self.fanout == 0:
+            buckets //= self.fanout
+            child = self.levels[level]
+            mins, maxs, sums = self._stats(level, child.size - self.fanout, child.size)
+            if level + 1 == len(self.levels):
+                self.levels.append(self._new_level(level + 1))
+            self.levels[level + 1].append((mins.min(), maxs.max(), sums.sum()))
+            level += 1
+
+    def downsample(self, max_points, method='avg'):
+        """
+        At most `max_points` values, each the mean ('avg'), 'max' or 'min'
+        of a consecutive run of samples.
+        """
+        if self.count <= max_points:
+            return self.levels[0].rows(0, self.count)[:, 0]
+
+        # Coarsest level whose buckets are no wider than one output point
+        samples_per_point = self.count / max_points
+        level, size = 0, 1
+        while level + 1 < len(self.levels) and size * self.fanout <= samples_per_point:
+            level += 1
+            size *= self.fanout
+
+        num_buckets = self.levels[level].size
+        mins, maxs, sums = self._stats(level, 0, num_buckets)
+        counts = np.full(num_buckets, size, dtype=np.float64)
+        if num_buckets * size < self.count:
+            tail = self._tail(level)
+            mins, maxs, sums = (np.append(mins, tail[0]), np.append(maxs, tail[1]), np.append(sums, tail[2]))
+            counts = np.append(counts, self.count - num_buckets * size)
+
+        bins = (np.arange(len(counts)) * size / samples_per_point).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bins, prepend=-1))
+        if method == 'avg':
+            return np.add.reduceat(sums, starts) / np.add.reduceat(counts, starts)
+        if method == 'max':
+            return np.maximum.reduceat(maxs, starts)
+        if method == 'min':
+            return np.minimum.reduceat(mins, starts)
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    def close(self):
+        for level in self.levels:
+            level.close()
+
+    def _new_level(self, level):
+        path = os.path.join(self.spill_dir, f"level{level}.bin") if self.spill_dir is not None else None
+        return _Column(1 if level == 0 else 3, path=path, chunk_size=self.chunk_size)
+
+    def _stats(self, level, start, stop):
+        rows = self.levels[level].rows(start, stop)
+        if level == 0:
+            values = rows[:, 0]
+            return values, values, values
+        return rows[:, 0], rows[:, 1], rows[:, 2]
+
+    def _tail(self, level):
+        # (min, max, sum) of the samples after the last complete bucket of `level`,
+        # built from the fewer than `fanout` trailing buckets of each finer level
+        covered = self.levels[level].size * self.fanout ** level
+        tail_min, tail_max, tail_sum = np.inf, -np.inf, 0.0
+        for k in range(level - 1, -1, -1):
+            start = covered // self.fanout ** k
+            stop = self.levels[k].size
+            if stop > start:
+                mins, maxs, sums = self._stats(k, start, stop)
+                tail_min = min(tail_min, mins.min())
+                tail_max = max(tail_max, maxs.max())
+                tail_sum += sums.sum()
+                covered += (stop - start) * self.fanout ** k
+        return tail_min, tail_max, tail_sum
@@ -0,0 +1,62 @@
+import csv
+import time
+
+
+class CsvRecorder:
+    """Append-only CSV writer with a buffered file handle.
+
+    Rows are written through a large write buffer and pushed to the OS once
+    `flush_rows` rows are pending or `flush_interval` seconds have passed,
+    so the per-row cost stays constant no matter how long the run is.
+    With mode 'w' the file is truncated on the first write (and again after
+    `reset()`); with mode 'a' rows are appended to the existing file.
+    Writing after `close()` reopens the file and appends.
+    """
+
+    def __init__(self, filename, fieldnames, mode='w', flush_rows=1000, flush_interval=1.0, buffer_size=1 << 16):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.mode = mode
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.file = None
+        self.writer = None
+        self.next_mode = mode
+        self.pending_rows = 0
+        self.last_flush_time = time.monotonic()
+
+    def open(self):
+        self.file = open(self.filename, self.next_mode, newline='', buffering=self.buffer_size)
+        self.next_mode = 'a'
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+        if self.file.tell() == 0:  # Write header if file is empty
+            self.writer.writeheader()
+        self.last_flush_time = time.monotonic()
+
+    def write_rows(self, rows):
+        if self.file is None:
+            self.open()
+        self.writer.writerows(rows)
+        self.pending_rows += len(rows)
+
+        if (self.pending_rows >= self.flush_rows or
+                time.monotonic() - self.last_flush_time >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+        self.pending_rows = 0
+        self.last_flush_time = time.monotonic()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = None
+        self.writer = None
+        self.pending_rows = 0
+
+    def reset(self):
+        self.close()
+        self.next_mode = self.mode
@@ -0,0 +1,124 @@
+import json
+import os
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+
+
+def trajectory_columns(num_lights, num_roads):
+    # name -> (dtype, per-tick shape)
+    return {
+        # Simulation clock time of the row in milliseconds (one row per tick)
+        'time_ms': ('<i8', ()),
+        'episode': ('<i4', ()),
+        'action': ('<i1', ()),
+        'reward': ('<f4', ()),
+        'done': ('|b1', ()),
+        'light_state': ('|u1', (num_lights,)),
+        'cars_in_stopping_areas': ('<i4', (num_roads,)),
+        'cars_at_end_areas': ('<i4', (num_roads,)),
+    }
+
+
+class TrajectoryWriter:
+    """Chunked, columnar binary log of per-tick simulation data.
+
+    A log is a directory holding `meta.json` and one raw little-endian
+    `<column>.bin` file per column. Rows are buffered in preallocated
+    chunk arrays and each full chunk is appended to the column files with
+    a single write per column. Use `TrajectoryReader` to load a log.
+    """
+
+    def __init__(self, path, num_lights, num_roads, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.columns = trajectory_columns(num_lights, num_roads)
+        self.buffers = {name: np.zeros((chunk_size,) + shape, dtype=dtype)
+                        for name, (dtype, shape) in self.columns.items()}
+        self.size = 0
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump({
+                'version': FORMAT_VERSION,
+                'chunk_size': chunk_size,
+                'columns': {name: {'dtype': dtype, 'shape': list(shape)}
+                            for name, (dtype, shape) in self.columns.items()},
+            }, f, indent=2)
+        self.files = {name: open(os.path.join(path, f'{name}.bin'), 'wb') for name in self.columns}
+
+    def append(self, time_ms, episode, action, reward, done, state):
+        i = self.size
+        buffers = self.buffers
+        buffers['time_ms'][i] = time_ms
+        buffers['episode'][i] = episode
+        buffers['action'][i] = action
+        buffers['reward'][i] = reward
+        buffers['done'][i] = done
+        buffers['light_state'][i] = [light[2] for light in state['traffic_lights']]
+        buffers['cars_in_stopping_areas'][i] = state['cars_in_stopping_areas']
+        buffers['cars_at_end_areas'][i] = state['cars_at_end_areas']
+        self.size += 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.size == 0:
+            return
+        for name, f in self.files.items():
+            self.buffers[name][:self.size].tofile(f)
+            f.flush()
+        self.size = 0
+
+    def close(self):
+        if self.files is None:
+            return
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        self.files = None
+
+
+class TrajectoryReader:
+    """Memory-mapped view of a log written by `TrajectoryWriter`.
+
+    `reader['reward']` returns a read-only NumPy array backed directly by
+    the column file, so slicing and aggregating does not copy the data.
+    Rows of a partially written (still running or crashed) log are cut to
+    the length common to all columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported trajectory log version: {meta['version']}")
+        self.chunk_size = meta['chunk_size']
+        self.columns = {name: (np.dtype(spec['dtype']), tuple(spec['shape']))
+                        for name, spec in meta['columns'].items()}
+
+        self.length = min(
+            os.path.getsize(self._column_file(name)) // (dtype.itemsize * int(np.prod(shape)))
+            for name, (dtype, shape) in self.columns.items()
+        )
+        self.arrays = {name: self._map(name) for name in self.columns}
+
+    def _column_file(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _map(self, name):
+        dtype, shape = self.columns[name]
+        if self.length == 0:
+            return np.empty((0,) + shape, dtype=dtype)
+        return np.memmap(self._column_file(name), dtype=dtype, mode='r', shape=(self.length,) + shape)
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __len__(self):
+        return self.length
+
+    def keys(self):
+        return self.columns.keys()
@@ -0,0 +1,90 @@
+import numpy as np
+
+
+class VecTrafficEnv:
+    """Steps N independent intersections in lockstep.
+
+    Wraps N `TrafficSimulation`s (normally created with one shared agent)
+    and exposes them as a single environment with stacked observations,
+    rewards and done flags, so a batched agent pays its per-call overhead
+    once per step instead of once per intersection. The sims' own
+    `agent` is not used; actions are supplied to `step`.
+    """
+
+    def __init__(self, sims):
+        self.sims = sims
+        self.num_envs = len(sims)
+        # 'dqn' encoding yields fixed-size vectors that stack into one array;
+        # tuple encodings are returned as a list of hashable states
+        self.stack_observations = all(sim.env.state_encoding == 'dqn' for sim in sims)
+
+    def observations(self):
+        return self._stack([sim.hashable_state for sim in self.sims])
+
+    def step(self, actions, current_time):
+        next_states = []
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+
+        for i, (sim, action) in enumerate(zip(self.sims, actions)):
+            sim.prepare_tick(current_time)
+            sim.action_index = int(action)
+            next_state, rewards[i], dones[i] = sim.step_environment(current_time)
+            sim.hashable_state = next_state
+            sim.update_statistics()
+            next_states.append(next_state)
+
+        return self._stack(next_states), rewards, dones
+
+    def close(self):
+        for sim in self.sims:
+            sim.close()
+
+    def _stack(self, states):
+        if self.stack_observations:
+            return np.asarray(states, dtype=np.float32)
+        return states
+
+
+class DecisionAccumulator:
+    """Semi-MDP transitions for a `VecTrafficEnv` whose actions are held for several ticks.
+
+    Between two decisions every environment adds up its rewards discounted
+    by `gamma` per tick, and its next state is bootstrapped with gamma^k for
+    the k ticks it took. An environment that reports done stops there: its
+    transition ends at the observation of that tick.
+    """
+
+    def __init__(self, vec_env, gamma):
+        self.vec_env = vec_env
+        self.gamma = gamma
+        self.start(vec_env.observations())
+
+    def start(self, observations):
+        num_envs = self.vec_env.num_envs
+        self.observations = observations
+        self.ticks = 0
+        self.returns = np.zeros(num_envs, dtype=np.float32)
+        self.discounts = np.ones(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.final_observations = {}
+
+    def add(self, rewards, dones, next_observations):
+        active = ~self.dones
+        self.returns[active] += self.discounts[active] * rewards[active]
+        self.discounts[active] *= self.gamma
+        for i in np.flatnonzero(active & dones).tolist():
+            self.final_observations[i] = next_observations[i]
+        self.dones |= dones
+        self.ticks += 1
+
+    def transitions(self, observations):
+        """
+        (states, rewards, next_states, dones, discounts) of the decision that
+        ends at `observations`.
+        """
+        next_observations = observations
+        if self.final_observations:
+            next_observations = self.vec_env._stack([self.final_observations.get(i, observation)
+                                                     for i, observation in enumerate(observations)])
+        return self.observations, self.returns, next_observations, self.dones, self.discounts
@@ -1,26 +1,234 @@
 import os
 import sys
+import json
+import time
+import argparse
 import pygame
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from env.environment import Environment
-from display.traffic_light import Light
-from simulation.traffic_sim import TrafficSimulation
+from simulation.clock import SimulationClock
+from simulation.evaluation import evaluate, format_report
+from simulation.sweep import format_results, load_spec, run_sweep
+from simulation.runner import (MODEL_NAMES, create_simulation, create_vec_env, run_headless, run_until, run_vectorized,
+                               save_checkpoint)
 from display.dashboard import Dashboard
+from env.background_logger import BackgroundLogger
+from simulation.parallel import ParallelTraining
+from simulation.profiler import PhaseProfiler, export_chrome_trace
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Multi-Model Traffic Light Simulation")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without a display, advancing the simulation in fixed ticks as fast as possible")
+    parser.add_argument("--ticks", type=int, default=100000,
+                        help="Number of simulation ticks to run in headless mode")
+    parser.add_argument("--tick-ms", type=int, default=16,
+                        help="Simulated milliseconds per tick in headless, parallel and decoupled visual mode")
+    parser.add_argument("--ticks-per-frame", type=int, default=1,
+                        help="Visual mode: run K fixed-step simulation ticks per rendered frame instead of one wall-clock update")
+    parser.add_argument("--adaptive-ticks", action="store_true",
+                        help="Visual mode: run as many fixed-step ticks as fit in each frame interval, rendering only the latest state")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="Update all cars with the batched NumPy car engine")
+    parser.add_argument("--spatial-index", action="store_true",
+                        help="Use a spatial index for car-following, collision and spawn-clearance queries")
+    parser.add_argument("--trajectory-log", action="store_true",
+                        help="Also write a columnar binary trajectory log to logs/<model>/trajectory")
+    parser.add_argument("--num-envs", type=int, default=1,
+                        help="Headless only: intersections per model, stepped in lockstep with one batched agent")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Train each model in its own worker process (shared-memory feed to the dashboard)")
+    parser.add_argument("--prioritized-replay", action="store_true",
+                        help="DQN: sample replay memory by TD-error priority (sum-tree) instead of uniformly")
+    parser.add_argument("--async-learner", action="store_true",
+                        help="DQN: run gradient steps on a background learner thread; the sim thread only does inference")
+    parser.add_argument("--updates-per-step", type=float, default=1.0,
+                        help="DQN with --async-learner: target gradient updates per environment step")
+    parser.add_argument("--spill-metrics", action="store_true",
+                        help="Spill the per-tick dashboard metric histories to logs/<model>/metrics instead of keeping them in memory")
+    parser.add_argument("--profile", action="store_true",
+                        help="Time each phase of TrafficSimulation.update: summary on exit, live panel in the dashboard")
+    parser.add_argument("--profile-trace", default=None,
+                        help="With --profile, also write a Chrome trace (chrome://tracing, Perfetto) to this path on exit")
+    parser.add_argument("--decision-steps", action="store_true",
+                        help="Learn one transition per agent decision (discounted reward over the ticks it is held) instead of one per tick")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="Warm-start each agent from <dir>/<model> if it exists and save it there on exit")
+    parser.add_argument("--checkpoint-replay", action="store_true",
+                        help="DQN with --checkpoint-dir: also save the replay memory")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Run the frozen greedy policies from --checkpoint-dir without learning and report throughput, waits and crashes")
+    parser.add_argument("--eval-episodes", type=int, default=5,
+                        help="With --evaluate: number of fixed-length episodes per model")
+    parser.add_argument("--episode-ticks", type=int, default=3750,
+                        help="With --evaluate: ticks per episode (3750 ticks of 16 ms = 1 simulated minute)")
+    parser.add_argument("--eval-output", default=None,
+                        help="With --evaluate: also write the report as JSON to this path")
+    parser.add_argument("--sweep", default=None,
+                        help="Run the hyperparameter sweep described by this JSON spec (see simulation/sweep.py) on a process pool")
+    parser.add_argument("--sweep-workers", type=int, default=None,
+                        help="With --sweep: worker processes (default: one per CPU)")
+    parser.add_argument("--sweep-output", default=None,
+                        help="With --sweep: results directory (default: sweeps/<spec name>)")
+    parser.add_argument("--models", nargs="+", default=list(MODEL_NAMES), choices=list(MODEL_NAMES))
+    args = parser.parse_args()
+    if args.evaluate and args.checkpoint_dir is None:
+        parser.error("--evaluate needs --checkpoint-dir")
+    return args
+
+
+def agent_options(args):
+    # Per-model agent keyword arguments selected on the command line
+    options = {model_name: {} for model_name in MODEL_NAMES}
+    if args.prioritized_replay:
+        options['dqn']['prioritized_replay'] = True
+    if args.async_learner:
+        options['dqn']['async_learning'] = True
+        options['dqn']['updates_per_step'] = args.updates_per_step
+    return options
+
+
+def save_checkpoints(args, agents):
+    if args.checkpoint_dir is None:
+        return
+    for model_name, agent in zip(args.models, agents):
+        save_checkpoint(agent, model_name, args.checkpoint_dir, include_replay=args.checkpoint_replay)
+    print(f"Saved checkpoints to {args.checkpoint_dir}")
+
+
+def create_profilers(args):
+    # None per model unless profiling; the phase timers only run in the single-process, one-env paths
+    if not args.profile or args.parallel or (args.headless and args.num_envs > 1):
+        return [None] * len(args.models)
+    return [PhaseProfiler() for _ in args.models]
+
+
+def report_profiles(args, profilers):
+    if profilers[0] is None:
+        return
+    for model_name, profiler in zip(args.models, profilers):
+        print(f"\n{MODEL_NAMES[model_name]} phase timings")
+        print(profiler.summary())
+    if args.profile_trace:
+        export_chrome_trace(args.profile_trace, {MODEL_NAMES[m]: p for m, p in zip(args.models, profilers)})
+        print(f"Wrote trace to {args.profile_trace}")
+
+
+def main_headless(args):
+    SIM_WIDTH = 400
+    SIM_HEIGHT = 400
+
+    clock = SimulationClock(tick_ms=args.tick_ms)
+    logger = BackgroundLogger()
+    sim_options = dict(clock=clock, width=SIM_WIDTH, height=SIM_HEIGHT,
+                       vectorized=args.vectorized, spatial_index=args.spatial_index,
+                       logger=logger, trajectory_log=args.trajectory_log, checkpoint_dir=args.checkpoint_dir,
+                       spill_metrics=args.spill_metrics, decision_steps=args.decision_steps)
+
+    print("Starting Headless Multi-Model Simulation...")
+    print(f"Ticks: {args.ticks} ({args.ticks * args.tick_ms / 1000:.0f}s simulated)")
+
+    if args.parallel:
+        training = ParallelTraining(args.models, ticks=args.ticks, tick_ms=args.tick_ms, width=SIM_WIDTH, height=SIM_HEIGHT,
+                                    agent_options=agent_options(args), checkpoint_dir=args.checkpoint_dir,
+                                    checkpoint_replay=args.checkpoint_replay, spill_metrics=args.spill_metrics,
+                                    decision_steps=args.decision_steps, vectorized=args.vectorized,
+                                    spatial_index=args.spatial_index, trajectory_log=args.trajectory_log)
+        print("One worker process per model")
+
+        start = time.perf_counter()
+        training.start()
+        try:
+            training.join()
+        finally:
+            training.close()
+        elapsed = time.perf_counter() - start
+        sims_per_model = [[view] for view in training.views]
+    elif args.num_envs > 1:
+        vec_envs, agents = zip(*[create_vec_env(model_name, args.num_envs, agent_options=agent_options(args)[model_name],
+                                                **sim_options)
+                                 for model_name in args.models])
+        print(f"Intersections per model: {args.num_envs}")
+
+        start = time.perf_counter()
+        run_vectorized(vec_envs, agents, clock, args.ticks, decision_steps=args.decision_steps)
+        elapsed = time.perf_counter() - start
+        for vec_env in vec_envs:
+            vec_env.close()
+        save_checkpoints(args, agents)
+        sims_per_model = [vec_env.sims for vec_env in vec_envs]
+    else:
+        profilers = create_profilers(args)
+        sims = [create_simulation(model_name, agent_options=agent_options(args)[model_name], profiler=profiler,
+                                  **sim_options)
+                for model_name, profiler in zip(args.models, profilers)]
+
+        start = time.perf_counter()
+        run_headless(sims, clock, args.ticks)
+        elapsed = time.perf_counter() - start
+        for sim in sims:
+            sim.close()
+        save_checkpoints(args, [sim.agent for sim in sims])
+        report_profiles(args, profilers)
+        sims_per_model = [[sim] for sim in sims]
+    logger.close()
+
+    print(f"Finished in {elapsed:.1f}s ({args.ticks / elapsed:.0f} ticks/s)")
+    for model_name, sims in zip(args.models, sims_per_model):
+        crashes = sum(sim.collision_count for sim in sims)
+        avg_wait = sum(sim.waiting_time_history[-1] if sim.waiting_time_history else 0 for sim in sims) / len(sims)
+        print(f"{MODEL_NAMES[model_name]}: Crashes: {crashes}, Avg Wait: {avg_wait:.1f}")
+
+
+def main_evaluate(args):
+    print(f"Evaluating {args.eval_episodes} x {args.episode_ticks} ticks per model from {args.checkpoint_dir}...")
+    logger = BackgroundLogger()
+    start = time.perf_counter()
+    reports = [evaluate(model_name, args.checkpoint_dir, episodes=args.eval_episodes, episode_ticks=args.episode_ticks,
+                        tick_ms=args.tick_ms, vectorized=args.vectorized, spatial_index=args.spatial_index, logger=logger)
+               for model_name in args.models]
+    elapsed = time.perf_counter() - start
+    logger.close()
+
+    ticks = len(args.models) * args.eval_episodes * args.episode_ticks
+    print(f"Finished in {elapsed:.1f}s ({ticks / elapsed:.0f} ticks/s)")
+    print(format_report(reports, MODEL_NAMES))
+    if args.eval_output:
+        with open(args.eval_output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"Wrote {args.eval_output}")
+
+
+def main_sweep(args):
+    spec = load_spec(args.sweep)
+    output_dir = args.sweep_output or os.path.join("sweeps", os.path.splitext(os.path.basename(args.sweep))[0])
+    start = time.perf_counter()
+    results = run_sweep(spec, output_dir, workers=args.sweep_workers)
+    print(f"Finished {len(results)} runs in {time.perf_counter() - start:.1f}s")
+    print(format_results(results, limit=20))
+    print(f"Wrote {os.path.join(output_dir, 'results.csv')}")
 
-# Agents
-from agents.dqn_agent import DQNAgent
-from agents.q_agent import QLearningAgent
-from agents.sarsa_agent import SARSAAgent
 
 def main():
+    args = parse_args()
+    if args.sweep:
+        main_sweep(args)
+        return
+    if args.evaluate:
+        main_evaluate(args)
+        return
+    if args.headless:
+        main_headless(args)
+        return
+
     # Configuration
     SIM_WIDTH = 400
     SIM_HEIGHT = 400
     DASHBOARD_HEIGHT = 250 # Increased dashboard height for 2 graphs or just labels
-    TOTAL_WIDTH = SIM_WIDTH * 3
+    TOTAL_WIDTH = SIM_WIDTH * len(args.models)
     TOTAL_HEIGHT = SIM_HEIGHT + DASHBOARD_HEIGHT
     FPS = 60
 
@@ -29,101 +237,93 @@ def main():
     screen = pygame.display.set_mode((TOTAL_WIDTH, TOTAL_HEIGHT))
     pygame.display.set_caption("Multi-Model Traffic Light Simulation Check")
     clock = pygame.time.Clock()
+    logger = BackgroundLogger()
 
-    # Define Actions
-    actions = [
-        (Light.GREEN, Light.RED),
-        (Light.RED, Light.GREEN),
-        (Light.GREEN, Light.GREEN),
-        (Light.RED, Light.RED)
-    ]
+    # With more than one tick per frame, simulated time follows a fixed-step clock instead of the wall clock
+    sim_clock = None
+    if not args.parallel and (args.ticks_per_frame > 1 or args.adaptive_ticks):
+        sim_clock = SimulationClock(tick_ms=args.tick_ms)
 
     # Initialize Simulations for each Model
-    models = ['dqn', 'q', 'sarsa']
-    sims = []
-    
-    # Common Parameters
-    # State Size: 2 lights * 4 + 2 roads * 1 = 10
-    state_size_dqn = 10 
-    
-    for i, model_name in enumerate(models):
-        log_dir = f"logs/{model_name}"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-
-        for log_file in ["collisions.csv", "max_wait_durations.csv", "rewards.csv", "data.csv"]:
-            full_path = os.path.join(log_dir, log_file)
-            if os.path.exists(full_path):
-                os.remove(full_path)
-
-        # Environment
-        state_encoding = 'dqn' if model_name == 'dqn' else 'tuple'
-        if model_name == 'dqn':
-            stopping_penalty = 0.05
-        elif model_name == 'q':
-            stopping_penalty = 0.05
-        else: # sarsa
-            stopping_penalty = 0.1
-            
-        env = Environment(
-            log_dir=log_dir, 
-            crash_penalty=10000, 
-            stopping_penalty=stopping_penalty, 
-            state_encoding=state_encoding
-        )
-
-        # Agent
-        if model_name == 'dqn':
-            agent = DQNAgent(state_size=state_size_dqn, action_size=len(actions))
-        elif model_name == 'q':
-            agent = QLearningAgent(actions=range(len(actions)))
-        elif model_name == 'sarsa':
-            agent = SARSAAgent(actions=range(len(actions)))
-
-        # Simulation
-        sim = TrafficSimulation(agent, env, actions, width=SIM_WIDTH, height=SIM_HEIGHT)
-        sims.append(sim)
+    profilers = create_profilers(args)
+    if args.parallel:
+        # Each model trains in its own process; the window only renders their shared-memory snapshots
+        training = ParallelTraining(args.models, tick_ms=args.tick_ms, width=SIM_WIDTH, height=SIM_HEIGHT,
+                                    agent_options=agent_options(args), checkpoint_dir=args.checkpoint_dir,
+                                    checkpoint_replay=args.checkpoint_replay, spill_metrics=args.spill_metrics,
+                                    decision_steps=args.decision_steps, vectorized=args.vectorized,
+                                    spatial_index=args.spatial_index, trajectory_log=args.trajectory_log)
+        training.start()
+        sims = training.views
+    else:
+        sims = [create_simulation(model_name, clock=sim_clock, width=SIM_WIDTH, height=SIM_HEIGHT,
+                                  agent_options=agent_options(args)[model_name],
+                                  vectorized=args.vectorized, spatial_index=args.spatial_index,
+                                  logger=logger, trajectory_log=args.trajectory_log,
+                                  checkpoint_dir=args.checkpoint_dir, spill_metrics=args.spill_metrics,
+                                  profiler=profiler, decision_steps=args.decision_steps)
+                for model_name, profiler in zip(args.models, profilers)]
 
     # Dashboard
-    dashboard = Dashboard(0, SIM_HEIGHT, TOTAL_WIDTH, DASHBOARD_HEIGHT, sims, ["DQN", "Q-Learning", "SARSA"])
+    dashboard = Dashboard(0, SIM_HEIGHT, TOTAL_WIDTH, DASHBOARD_HEIGHT, sims, [MODEL_NAMES[m] for m in args.models],
+                          profilers=profilers if profilers[0] is not None else None)
 
     print("Starting Multi-Model Simulation...")
     print(f"Window Size: {TOTAL_WIDTH}x{TOTAL_HEIGHT}")
 
+    # One subsurface per simulation; each pushes only the regions it changed
+    subscreens = [screen.subsurface(pygame.Rect(i * SIM_WIDTH, 0, SIM_WIDTH, SIM_HEIGHT)) for i in range(len(sims))]
+
+    render_time = 0
     running = True
     while running:
         current_time = pygame.time.get_ticks()
+        frame_start = time.perf_counter()
 
         # Event Handling
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-        
 
-        for sim in sims:
-            sim.update(current_time)
-
-        # Drawing
-        screen.fill((0, 0, 0))
 
+        if args.parallel:
+            training.poll()
+        elif args.adaptive_ticks:
+            # Leave room in the frame interval for rendering, estimated from the previous frame
+            run_until(sims, sim_clock, frame_start + 1 / FPS - render_time)
+        elif sim_clock is not None:
+            run_headless(sims, sim_clock, args.ticks_per_frame)
+        else:
+            for sim in sims:
+                sim.update(current_time)
+        render_start = time.perf_counter()
 
-        for i, sim in enumerate(sims):
-            # Create a subsurface or just draw to main screen with offset?
+        # Drawing (sims and dashboard cover the whole window, so no full-screen fill)
+        dirty_rects = []
+        for i, (sim, subscreen) in enumerate(zip(sims, subscreens)):
+            dirty_rects += [rect.move(i * SIM_WIDTH, 0) for rect in sim.draw_dirty(subscreen)]
 
 
-            subscreen = screen.subsurface(pygame.Rect(i * SIM_WIDTH, 0, SIM_WIDTH, SIM_HEIGHT))
-            sim.draw(subscreen)
-            
-
             pygame.draw.rect(screen, (0, 0, 0), (i * SIM_WIDTH, 0, SIM_WIDTH, SIM_HEIGHT), 2)
 
         # Draw Dashboard
-        dashboard.draw(screen)
+        dirty_rects.append(dashboard.draw(screen))
 
-        pygame.display.flip()
+        pygame.display.update(dirty_rects)
+        render_time = time.perf_counter() - render_start
         clock.tick(FPS)
 
+    if args.parallel:
+        try:
+            training.stop()
+        finally:
+            training.close()
+    else:
+        for sim in sims:
+            sim.close()
+        save_checkpoints(args, [sim.agent for sim in sims])
+        report_profiles(args, profilers)
+    logger.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,145 @@
+import numpy as np
+from display.traffic_light import Light
+
+
+class VectorizedCarEngine:
+    """Struct-of-arrays replacement for calling `Car.update` on every car.
+
+    Positions, speeds, directions and waiting durations of all cars are
+    gathered into NumPy arrays once per tick; red-light stopping,
+    car-following and AABB collision are then computed for every car in
+    batched array operations and the results are written back to the cars.
+
+    The per-car rules are the same as in `Car.update`. The difference is
+    ordering: `Car.update` runs car by car, so a car sees the already moved
+    positions of the cars updated before it. Here every car sees the
+    positions from the start of the tick, and speeds propagate from each
+    leader to its follower, which matches the sequential update for cars
+    kept in spawn order (leaders first).
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.width = np.zeros(0)
+        self.height = np.zeros(0)
+        self.speed_x = np.zeros(0)
+        self.speed_y = np.zeros(0)
+        self.original_speed_x = np.zeros(0)
+        self.original_speed_y = np.zeros(0)
+        self.direction_x = np.zeros(0, dtype=np.int8)
+        self.direction_y = np.zeros(0, dtype=np.int8)
+        self.waiting_duration = np.zeros(0, dtype=np.int64)
+        self.crashed = np.zeros(0, dtype=bool)
+
+    def load(self, all_cars):
+        n = len(all_cars)
+        self.size = n
+        self.x = np.fromiter((car.x for car in all_cars), dtype=float, count=n)
+        self.y = np.fromiter((car.y for car in all_cars), dtype=float, count=n)
+        self.width = np.fromiter((car.width for car in all_cars), dtype=float, count=n)
+        self.height = np.fromiter((car.height for car in all_cars), dtype=float, count=n)
+        self.original_speed_x = np.fromiter((car.original_speed_x for car in all_cars), dtype=float, count=n)
+        self.original_speed_y = np.fromiter((car.original_speed_y for car in all_cars), dtype=float, count=n)
+        self.direction_x = np.sign(self.original_speed_x).astype(np.int8)
+        self.direction_y = np.sign(self.original_speed_y).astype(np.int8)
+        self.waiting_duration = np.fromiter((car.waiting_duration for car in all_cars), dtype=np.int64, count=n)
+        self.crashed = np.fromiter((car.crashed for car in all_cars), dtype=bool, count=n)
+
+    def store(self, all_cars):
+        x = self.x.tolist()
+        y = self.y.tolist()
+        speed_x = self.speed_x.tolist()
+        speed_y = self.speed_y.tolist()
+        waiting_duration = self.waiting_duration.tolist()
+        crashed = self.crashed.tolist()
+        for i, car in enumerate(all_cars):
+            car.x = x[i]
+            car.y = y[i]
+            car.speed_x = speed_x[i]
+            car.speed_y = speed_y[i]
+            car.waiting_duration = waiting_duration[i]
+            car.crashed = crashed[i]
+
+    def stopped_at_red(self, traffic_lights):
+        stopped = np.zeros(self.size, dtype=bool)
+        for traffic_light in traffic_lights:
+            if traffic_light.current_light == Light.RED:
+                road = traffic_light.road
+                stopped |= ((road.start_x <= self.x) & (self.x <= road.end_x) &
+                            (road.start_y <= self.y) & (self.y <= road.end_y))
+        return stopped
+
+    def find_leaders(self, speed_x, speed_y, distance):
+        # Pairwise (follower i, candidate j) version of Car.get_car_in_proximity
+        dx = self.x[None, :] - self.x[:, None]
+        dy = self.y[None, :] - self.y[:, None]
+        lateral_x = np.abs(dy) < self.height[:, None]
+        lateral_y = np.abs(dx) < self.width[:, None]
+
+        # Same branch order as Car.is_in_proximity
+        right = (speed_x > 0)[:, None]
+        left = (~right[:, 0] & (speed_x < 0))[:, None]
+        down = (~right[:, 0] & ~left[:, 0] & (speed_y > 0))[:, None]
+        up = (~right[:, 0] & ~left[:, 0] & ~down[:, 0] & (speed_y < 0))[:, None]
+
+        gap = np.where(right, dx, np.where(left, -dx, np.where(down, dy, -dy)))
+        lateral = np.where(right | left, lateral_x, lateral_y)
+        in_proximity = (right | left | down | up) & (gap > 0) & (gap < distance) & lateral
+
+        same_direction = ((self.direction_x[:, None] == self.direction_x[None, :]) &
+                          (self.direction_y[:, None] == self.direction_y[None, :]))
+        candidates = in_proximity & same_direction
+        np.fill_diagonal(candidates, False)
+
+        gap = np.where(candidates, gap, np.inf)
+        leaders = np.argmin(gap, axis=1)
+        leaders[~candidates.any(axis=1)] = -1
+        return leaders
+
+    def collisions(self):
+        overlap = ((self.x[:, None] < self.x[None, :] + self.width[None, :]) &
+                   (self.x[:, None] + self.width[:, None] > self.x[None, :]) &
+                   (self.y[:, None] < self.y[None, :] + self.height[None, :]) &
+                   (self.y[:, None] + self.height[:, None] > self.y[None, :]))
+        np.fill_diagonal(overlap, False)
+        return overlap.any(axis=1)
+
+    def update(self, all_cars, traffic_lights, speed_reduction_distance):
+        if not all_cars:
+            return
+        self.load(all_cars)
+
+        stopped = self.stopped_at_red(traffic_lights)
+        base_speed_x = np.where(stopped, 0.0, self.original_speed_x)
+        base_speed_y = np.where(stopped, 0.0, self.original_speed_y)
+
+        # A car stopped at a red light has zero speed, so Car.is_in_proximity never
+        # finds a leader for it and stop_if_red_lights counts its wait twice.
+        leaders = self.find_leaders(base_speed_x, base_speed_y, speed_reduction_distance)
+        following = leaders >= 0
+
+        # Resolve car-following along each queue: a follower never drives faster
+        # than its (already updated) leader.
+        speed_x = base_speed_x
+        speed_y = base_speed_y
+        for _ in range(self.size):
+            new_speed_x = np.where(following, np.minimum(base_speed_x, speed_x[leaders]), base_speed_x)
+            new_speed_y = np.where(following, np.minimum(base_speed_y, speed_y[leaders]), base_speed_y)
+            converged = np.array_equal(new_speed_x, speed_x) and np.array_equal(new_speed_y, speed_y)
+            speed_x, speed_y = new_speed_x, new_speed_y
+            if converged:
+                break
+        self.speed_x = speed_x
+        self.speed_y = speed_y
+
+        self.waiting_duration += 2 * stopped
+        self.waiting_duration += following & (speed_x == 0) & (speed_y == 0)
+
+        self.crashed |= self.collisions()
+
+        self.x += speed_x
+        self.y += speed_y
+
+        self.store(all_cars)
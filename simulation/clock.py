@@ -0,0 +1,27 @@
+import pygame
+
+
+class PygameClock:
+    """Wall-clock time source backed by pygame (milliseconds since pygame.init)."""
+
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+
+class SimulationClock:
+    """Deterministic time source advanced manually in fixed ticks.
+
+    Used for headless runs where the simulation should advance as fast as
+    the CPU allows instead of following the wall clock.
+    """
+
+    def __init__(self, tick_ms=16, start_ms=0):
+        self.tick_ms = tick_ms
+        self.current_time = start_ms
+
+    def get_ticks(self):
+        return self.current_time
+
+    def tick(self, n=1):
+        self.current_time += self.tick_ms * n
+        return self.current_time
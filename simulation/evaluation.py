@@ -0,0 +1,71 @@
+import os
+import random
+import numpy as np
+from simulation.clock import SimulationClock
+from simulation.runner import create_simulation, load_policy_agent
+
+
+def run_episode(model_name, agent, episode_ticks, tick_ms=16, seed=None, log_dir=None, **sim_options):
+    """
+    One fixed-length episode of a frozen agent on a fresh intersection.
+    Returns the cars that exited, the crashes and the waiting durations of
+    every car seen (removed cars plus those still on the road at the end).
+    """
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    clock = SimulationClock(tick_ms=tick_ms)
+    # Decision-level stepping: without learning, states only need encoding when the agent acts
+    sim = create_simulation(model_name, clock=clock, log_dir=log_dir, agent=agent, decision_steps=True,
+                            learning=False, **sim_options)
+    sim.completed_waits = []
+    for _ in range(episode_ticks):
+        sim.update(clock.tick())
+
+    waits = sim.completed_waits + [car.waiting_duration for car in sim.all_cars]
+    result = {'exited': sim.exited_cars_count, 'crashes': sim.collision_count, 'waits': waits}
+    sim.close()
+    return result
+
+
+def evaluate(model_name, checkpoint_dir, episodes=5, episode_ticks=3750, tick_ms=16, seed=0, log_root="logs", **sim_options):
+    """
+    Run `episodes` fixed-length episodes of the frozen policy in
+    `checkpoint_dir` and aggregate them: throughput (exited cars per
+    simulated minute), mean and p95 waiting_duration (in ticks) over all
+    cars, and crashes.
+    """
+    agent = load_policy_agent(model_name, checkpoint_dir)
+    report = evaluate_agent(model_name, agent, episodes, episode_ticks, tick_ms=tick_ms, seed=seed,
+                            log_dir=os.path.join(log_root, "eval", model_name), **sim_options)
+    agent.close()
+    return report
+
+
+def evaluate_agent(model_name, agent, episodes, episode_ticks, tick_ms=16, seed=0, log_dir=None, **sim_options):
+    # Same as evaluate, for an agent already in memory (see runner.freeze_agent)
+    results = [run_episode(model_name, agent, episode_ticks, tick_ms=tick_ms,
+                           seed=None if seed is None else seed + episode, log_dir=log_dir, **sim_options)
+               for episode in range(episodes)]
+
+    minutes = episodes * episode_ticks * tick_ms / 60000
+    waits = np.array([wait for result in results for wait in result['waits']], dtype=np.float64)
+    return {
+        'model': model_name,
+        'episodes': episodes,
+        'episode_ticks': episode_ticks,
+        'exited': sum(result['exited'] for result in results),
+        'throughput_per_min': sum(result['exited'] for result in results) / minutes,
+        'mean_wait': float(waits.mean()) if len(waits) else 0.0,
+        'p95_wait': float(np.percentile(waits, 95)) if len(waits) else 0.0,
+        'crashes': sum(result['crashes'] for result in results),
+        'crashes_per_episode': [result['crashes'] for result in results],
+    }
+
+
+def format_report(reports, names):
+    lines = [f"{'model':<12} {'exited':>7} {'per min':>8} {'mean wait':>10} {'p95 wait':>9} {'crashes':>8}"]
+    for report in reports:
+        lines.append(f"{names[report['model']]:<12} {report['exited']:>7} {report['throughput_per_min']:>8.1f} "
+                     f"{report['mean_wait']:>10.1f} {report['p95_wait']:>9.1f} {report['crashes']:>8}")
+    return "\n".join(lines)
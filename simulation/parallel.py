@@ -0,0 +1,229 @@
+import sys
+import tempfile
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from display.car import Car
+from display.traffic_light import Light
+from env.environment import Environment
+from env.background_logger import BackgroundLogger
+from env.metric_series import MetricSeries
+from simulation.clock import SimulationClock
+from simulation.traffic_sim import TrafficSimulation
+from simulation.runner import ACTIONS, create_simulation, save_checkpoint
+
+MAX_CARS = 256
+MAX_LIGHTS = 4
+# Per car: x, y, original width, original height, direction x, direction y
+CAR_FIELDS = 6
+
+# Header slots
+SEQ, TICKS, COLLISIONS, AVG_WAIT, FINISHED, NUM_CARS, NUM_LIGHTS = range(7)
+HEADER_SIZE = 8
+LIGHTS_OFFSET = HEADER_SIZE
+CARS_OFFSET = LIGHTS_OFFSET + MAX_LIGHTS
+STATE_SIZE = CARS_OFFSET + MAX_CARS * CAR_FIELDS
+
+
+class SharedSimState:
+    """Fixed-layout float64 block in shared memory holding the latest metrics and car positions of one simulation.
+
+    The worker is the only writer. `SEQ` is odd while a write is in progress
+    (a sequence lock), so readers retry instead of seeing a half-written
+    snapshot, and neither side ever blocks the other.
+    """
+
+    def __init__(self, name=None):
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=STATE_SIZE * 8)
+        self.array = np.ndarray((STATE_SIZE,), dtype=np.float64, buffer=self.shm.buf)
+        if create:
+            self.array[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, sim, ticks, finished=False):
+        a = self.array
+        a[SEQ] += 1
+        a[TICKS] = ticks
+        a[COLLISIONS] = sim.collision_count
+        a[AVG_WAIT] = sim.waiting_time_history[-1] if sim.waiting_time_history else 0
+        a[FINISHED] = finished
+
+        lights = sim.traffic_lights[:MAX_LIGHTS]
+        a[NUM_LIGHTS] = len(lights)
+        for i, light in enumerate(lights):
+            a[LIGHTS_OFFSET + i] = light.current_light.value
+
+        cars = sim.all_cars[:MAX_CARS]
+        a[NUM_CARS] = len(cars)
+        if cars:
+            a[CARS_OFFSET:CARS_OFFSET + len(cars) * CAR_FIELDS] = [
+                value
+                for car in cars
+                for value in (car.x, car.y, car.original_width, car.original_height, car.direction[0], car.direction[1])
+            ]
+        a[SEQ] += 1
+
+    def snapshot(self, retries=100):
+        a = self.array
+        for _ in range(retries):
+            seq = a[SEQ]
+            if not seq % 2:
+                snapshot = a.copy()
+                # Unchanged after the copy: no write started or finished while copying
+                if a[SEQ] == seq:
+                    return snapshot
+            # Let the writer finish instead of spinning through every retry
+            time.sleep(0)
+        return None
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def run_worker(model_name, shm_name, stop_event, ticks=None, tick_ms=16, width=400, height=400, log_root="logs",
+               publish_every=4, agent_options=None, checkpoint_dir=None, checkpoint_replay=False, spill_metrics=False,
+               decision_steps=False, vectorized=False, spatial_index=False, trajectory_log=False):
+    """Worker process entry point: trains one model headless and publishes its state to shared memory."""
+    shared = SharedSimState(shm_name)
+    clock = SimulationClock(tick_ms=tick_ms)
+    logger = BackgroundLogger()
+    sim = create_simulation(model_name, clock=clock, width=width, height=height, log_root=log_root, logger=logger,
+                            agent_options=agent_options, checkpoint_dir=checkpoint_dir, spill_metrics=spill_metrics,
+                            decision_steps=decision_steps, vectorized=vectorized, spatial_index=spatial_index,
+                            trajectory_log=trajectory_log)
+    if 'torch' in sys.modules:
+        # One intra-op thread per worker; the workers themselves already use every core
+        sys.modules['torch'].set_num_threads(1)
+
+    tick = 0
+    while not stop_event.is_set() and (ticks is None or tick < ticks):
+        sim.update(clock.tick())
+        tick += 1
+        if tick % publish_every == 0:
+            shared.publish(sim, tick)
+
+    shared.publish(sim, tick, finished=True)
+    sim.close()
+    if checkpoint_dir is not None:
+        save_checkpoint(sim.agent, model_name, checkpoint_dir, include_replay=checkpoint_replay)
+    logger.close()
+    shared.close()
+
+
+class SharedSimView:
+    """Read-only stand-in for a TrafficSimulation running in another process.
+
+    Exposes the attributes `Dashboard` reads (`collision_count`,
+    `waiting_time_history`, `collision_history`) and `draw`/`draw_dirty`, both
+    fed from the worker's `SharedSimState`. Histories get one sample per
+    `poll()` that saw new data.
+    """
+
+    def __init__(self, shared, width=400, height=400):
+        self.shared = shared
+        # Static roads and lights for drawing; never updated or stepped. Its Environment gets a
+        # throwaway log_dir so the display process never puts CSV files in the working directory.
+        self.log_dir = tempfile.TemporaryDirectory(prefix="sim-view-")
+        self.layout = TrafficSimulation(None, Environment(log_dir=self.log_dir.name, clock=SimulationClock()), ACTIONS,
+                                        width=width, height=height)
+        self.ticks = 0
+        self.finished = False
+        self.collision_count = 0
+        self.waiting_time_history = MetricSeries()
+        self.collision_history = MetricSeries()
+
+    def poll(self):
+        snapshot = self.shared.snapshot()
+        if snapshot is None or (snapshot[TICKS] == self.ticks and not snapshot[FINISHED]):
+            return
+
+        self.ticks = int(snapshot[TICKS])
+        self.finished = bool(snapshot[FINISHED])
+        self.collision_count = int(snapshot[COLLISIONS])
+        self.waiting_time_history.append(float(snapshot[AVG_WAIT]))
+        self.collision_history.append(self.collision_count)
+
+        for i in range(int(snapshot[NUM_LIGHTS])):
+            self.layout.traffic_lights[i].current_light = Light(int(snapshot[LIGHTS_OFFSET + i]))
+
+        num_cars = int(snapshot[NUM_CARS])
+        cars = snapshot[CARS_OFFSET:CARS_OFFSET + num_cars * CAR_FIELDS].reshape(num_cars, CAR_FIELDS)
+        color = self.layout.red
+        self.layout.all_cars = [Car(x, y, w, h, color, dx, dy) for x, y, w, h, dx, dy in cars.tolist()]
+
+    def draw(self, surface):
+        self.layout.draw(surface)
+
+    def draw_dirty(self, surface):
+        return self.layout.draw_dirty(surface)
+
+    def close(self):
+        self.log_dir.cleanup()
+
+
+class ParallelTraining:
+    """Runs each model's simulation and learning in its own worker process.
+
+    `agent_options` maps a model name to keyword arguments for its agent.
+    With `checkpoint_dir`, each worker warm-starts from and saves to its
+    model's checkpoint. `join` raises if a worker did not exit cleanly.
+    """
+
+    def __init__(self, model_names, ticks=None, tick_ms=16, width=400, height=400, log_root="logs", publish_every=4,
+                 agent_options=None, checkpoint_dir=None, checkpoint_replay=False, spill_metrics=False,
+                 decision_steps=False, vectorized=False, spatial_index=False, trajectory_log=False):
+        agent_options = agent_options or {}
+        context = mp.get_context('spawn')
+        self.stop_event = context.Event()
+        self.states = [SharedSimState() for _ in model_names]
+        self.processes = [
+            context.Process(
+                target=run_worker,
+                args=(model_name, state.name, self.stop_event),
+                kwargs=dict(ticks=ticks, tick_ms=tick_ms, width=width, height=height, log_root=log_root,
+                            publish_every=publish_every, agent_options=agent_options.get(model_name),
+                            checkpoint_dir=checkpoint_dir, checkpoint_replay=checkpoint_replay,
+                            spill_metrics=spill_metrics, decision_steps=decision_steps, vectorized=vectorized,
+                            spatial_index=spatial_index, trajectory_log=trajectory_log),
+                name=f"train-{model_name}",
+                daemon=True
+            )
+            for model_name, state in zip(model_names, self.states)
+        ]
+        self.views = [SharedSimView(state, width=width, height=height) for state in self.states]
+
+    def start(self):
+        for process in self.processes:
+            process.start()
+
+    def poll(self):
+        for view in self.views:
+            view.poll()
+
+    def join(self):
+        for process in self.processes:
+            process.join()
+        self.poll()
+        failed = [f"{process.name} (exit code {process.exitcode})" for process in self.processes if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Training worker(s) failed: {', '.join(failed)}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+    def close(self):
+        for state in self.states:
+            state.close()
+            state.unlink()
+        for view in self.views:
+            view.close()
@@ -0,0 +1,108 @@
+import json
+import time
+import numpy as np
+
+# Shared time origin, so traces of several profilers line up
+ORIGIN_NS = time.perf_counter_ns()
+
+
+class PhaseProfiler:
+    """Wall-clock timer for the phases of a simulation tick.
+
+    `start_tick()` opens a tick, each `lap(phase)` charges the time since the
+    previous lap to `phase`, and `end_tick()` records the whole tick. The
+    last `window` durations of every phase are kept for rolling
+    percentiles (`stats`), and the last `trace_capacity` events for
+    `export_chrome_trace`. Code under profile calls it only when a profiler
+    is set, so a run without one pays nothing.
+    """
+
+    def __init__(self, window=1000, trace_capacity=100000):
+        self.window = window
+        self.phases = {}
+        # Indexed by phase id: a `window`-sized ring buffer of durations (added with the
+        # phase's first lap) and the number of calls seen
+        self.durations = []
+        self.counts = []
+
+        # Preallocated ring buffers of trace events; plain lists are cheaper than NumPy for single-element stores
+        self.trace_capacity = trace_capacity
+        self.trace_phase = [0] * trace_capacity
+        self.trace_start = [0] * trace_capacity
+        self.trace_duration = [0] * trace_capacity
+        self.trace_size = 0
+
+        self.tick_start = self.last = time.perf_counter_ns()
+
+    def start_tick(self):
+        self.tick_start = self.last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        now = time.perf_counter_ns()
+        self._record(phase, self.last, now - self.last)
+        self.last = now
+
+    def end_tick(self):
+        now = time.perf_counter_ns()
+        self._record('tick', self.tick_start, now - self.tick_start)
+        self.last = now
+
+    def stats(self):
+        """
+        Per phase: calls seen, and mean/p50/p95/p99/max in milliseconds
+        over the last `window` calls.
+        """
+        stats = {}
+        for phase, i in self.phases.items():
+            recent = np.array(self.durations[i][:min(self.counts[i], self.window)]) / 1e6
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            stats[phase] = {'count': self.counts[i], 'mean_ms': float(recent.mean()), 'p50_ms': float(p50),
+                            'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(recent.max())}
+        return stats
+
+    def summary(self):
+        lines = [f"{'phase':<16} {'count':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)"]
+        for phase, s in self.stats().items():
+            lines.append(f"{phase:<16} {s['count']:>8} {s['mean_ms']:>8.3f} {s['p50_ms']:>8.3f} "
+                         f"{s['p95_ms']:>8.3f} {s['p99_ms']:>8.3f}")
+        return "\n".join(lines)
+
+    def trace_events(self, pid=0, name=None):
+        # Chrome trace "complete" events for the recorded window, oldest first
+        size = min(self.trace_size, self.trace_capacity)
+        names = list(self.phases)
+        events = []
+        for k in range(self.trace_size - size, self.trace_size):
+            j = k % self.trace_capacity
+            events.append({'name': names[self.trace_phase[j]], 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': (self.trace_start[j] - ORIGIN_NS) / 1000, 'dur': self.trace_duration[j] / 1000})
+        if name is not None:
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': name}})
+        return events
+
+    def _record(self, phase, start, duration):
+        i = self.phases.get(phase)
+        if i is None:
+            i = self.phases[phase] = len(self.phases)
+            self.durations.append([0] * self.window)
+            self.counts.append(0)
+        self.durations[i][self.counts[i] % self.window] = duration
+        self.counts[i] += 1
+
+        j = self.trace_size % self.trace_capacity
+        self.trace_phase[j] = i
+        self.trace_start[j] = start
+        self.trace_duration[j] = duration
+        self.trace_size += 1
+
+
+def export_chrome_trace(path, profilers):
+    """
+    Write `profilers` (a dict of name -> PhaseProfiler) as one Chrome trace
+    file, one process per profiler; open it in chrome://tracing or Perfetto.
+    """
+    events = []
+    for pid, (name, profiler) in enumerate(profilers.items()):
+        events.extend(profiler.trace_events(pid=pid, name=name))
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
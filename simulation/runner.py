@@ -0,0 +1,205 @@
+import os
+import time
+from env.environment import Environment
+from env.trajectory_log import TrajectoryWriter
+from env.vec_env import DecisionAccumulator, VecTrafficEnv
+from display.traffic_light import Light
+from simulation.traffic_sim import TrafficSimulation
+from simulation.car_engine import VectorizedCarEngine
+from simulation.spatial_index import SpatialIndex
+
+# Agents (agent classes are imported lazily, see agents/registry.py)
+from agents.numpy_policy import NumpyPolicy
+from agents.policy_agent import PolicyAgent
+from agents.q_table import QTable
+from agents.registry import get_agent_class
+from agents.table_policy import TablePolicy
+
+# Define Actions
+ACTIONS = [
+    (Light.GREEN, Light.RED),
+    (Light.RED, Light.GREEN),
+    (Light.GREEN, Light.GREEN),
+    (Light.RED, Light.RED)
+]
+
+MODEL_NAMES = {
+    'dqn': "DQN",
+    'q': "Q-Learning",
+    'sarsa': "SARSA",
+}
+
+# The intersection built by TrafficSimulation: two traffic lights, two main roads
+NUM_LIGHTS = 2
+NUM_MAIN_ROADS = 2
+
+# State Size: 2 lights * 4 + 2 roads * 1 = 10
+STATE_SIZE_DQN = NUM_LIGHTS * 4 + NUM_MAIN_ROADS
+
+LOG_FILES = ["rewards.csv", "data.csv"]
+
+
+def prepare_log_dir(log_dir):
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    for log_file in LOG_FILES:
+        full_path = os.path.join(log_dir, log_file)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+
+def create_agent(model_name, action_size=len(ACTIONS), checkpoint_dir=None, **agent_options):
+    agent_class = get_agent_class(model_name)
+    if model_name == 'dqn':
+        agent = agent_class(state_size=STATE_SIZE_DQN, action_size=action_size, **agent_options)
+    else:
+        agent = agent_class(actions=range(action_size), **agent_options)
+
+    # Warm start from the model's last checkpoint, if there is one
+    if checkpoint_dir is not None and os.path.isdir(checkpoint_path(checkpoint_dir, model_name)):
+        agent.load(checkpoint_path(checkpoint_dir, model_name))
+    return agent
+
+
+def checkpoint_path(checkpoint_dir, model_name):
+    return os.path.join(checkpoint_dir, model_name)
+
+
+def save_checkpoint(agent, model_name, checkpoint_dir, include_replay=False):
+    path = checkpoint_path(checkpoint_dir, model_name)
+    if model_name == 'dqn':
+        agent.save(path, include_replay=include_replay)
+    else:
+        agent.save(path)
+
+
+def load_policy_agent(model_name, checkpoint_dir):
+    """
+    Frozen greedy PolicyAgent from the model's checkpoint: the torch-free
+    `policy.npz` for DQN (exported from `dqn.pt` for older checkpoints),
+    the memory-mapped Q-table for Q-Learning and SARSA.
+    """
+    path = checkpoint_path(checkpoint_dir, model_name)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No {model_name} checkpoint in {checkpoint_dir}")
+    if model_name == 'dqn':
+        if os.path.exists(os.path.join(path, 'policy.npz')):
+            policy = NumpyPolicy.load(os.path.join(path, 'policy.npz'))
+        else:
+            policy = create_agent(model_name, checkpoint_dir=checkpoint_dir).export_policy()
+    elif model_name in ('q', 'sarsa'):
+        policy = TablePolicy(QTable.load(path))
+    else:
+        raise ValueError(f"Unknown model: {model_name}")
+    return PolicyAgent(policy)
+
+
+def freeze_agent(model_name, agent):
+    """Frozen greedy PolicyAgent acting with a trained agent's policy (DQN weights are copied, Q-tables shared)."""
+    if model_name == 'dqn':
+        return PolicyAgent(agent.export_policy())
+    return PolicyAgent(TablePolicy(agent.q_table))
+
+
+def create_simulation(model_name, clock=None, width=400, height=400, log_root="logs", log_dir=None, agent=None,
+                      agent_options=None, vectorized=False, spatial_index=False, logger=None, trajectory_log=False,
+                      checkpoint_dir=None, spill_metrics=False, profiler=None, decision_steps=False, learning=True,
+                      env_options=None):
+    if log_dir is None:
+        log_dir = os.path.join(log_root, model_name)
+    prepare_log_dir(log_dir)
+
+    # Environment
+    state_encoding = 'dqn' if model_name == 'dqn' else 'tuple'
+    if model_name == 'sarsa':
+        stopping_penalty = 0.1
+    else:
+        stopping_penalty = 0.05
+
+    # env_options override the reward settings (crash_penalty, stopping_penalty, min_switch_time)
+    env = Environment(**{
+        'log_dir': log_dir,
+        'crash_penalty': 10000,
+        'stopping_penalty': stopping_penalty,
+        'state_encoding': state_encoding,
+        'clock': clock,
+        'car_engine': VectorizedCarEngine() if vectorized else None,
+        'logger': logger,
+        **(env_options or {})
+    })
+
+    if agent is None:
+        agent = create_agent(model_name, checkpoint_dir=checkpoint_dir, **(agent_options or {}))
+    sim = TrafficSimulation(agent, env, ACTIONS, width=width, height=height,
+                            spatial_index=SpatialIndex() if spatial_index else None,
+                            trajectory_log=TrajectoryWriter(os.path.join(log_dir, "trajectory"), NUM_LIGHTS, NUM_MAIN_ROADS)
+                            if trajectory_log else None,
+                            metrics_dir=os.path.join(log_dir, "metrics") if spill_metrics else None,
+                            profiler=profiler, decision_steps=decision_steps, learning=learning)
+    return sim
+
+
+def run_headless(sims, clock, ticks):
+    """Advance every simulation `ticks` times on a fixed-step clock."""
+    for _ in range(ticks):
+        current_time = clock.tick()
+        for sim in sims:
+            sim.update(current_time)
+
+
+def run_until(sims, clock, deadline):
+    """
+    Advance every simulation on a fixed-step clock until `time.perf_counter()`
+    passes `deadline` (at least one tick). Returns the number of ticks run.
+    """
+    ticks = 0
+    while ticks == 0 or time.perf_counter() < deadline:
+        current_time = clock.tick()
+        for sim in sims:
+            sim.update(current_time)
+        ticks += 1
+    return ticks
+
+
+def create_vec_env(model_name, num_envs, clock=None, log_root="logs", agent_options=None, checkpoint_dir=None, **kwargs):
+    """N lockstep simulations of one model, all driven by a single shared agent."""
+    agent = create_agent(model_name, checkpoint_dir=checkpoint_dir, **(agent_options or {}))
+    sims = [create_simulation(model_name, clock=clock, log_dir=os.path.join(log_root, model_name, f"env_{i}"),
+                              agent=agent, **kwargs)
+            for i in range(num_envs)]
+    return VecTrafficEnv(sims), agent
+
+
+def run_vectorized(vec_envs, agents, clock, ticks, decision_steps=False):
+    """
+    Headless loop over vectorized environments: one act/learn call per batch
+    of intersections. With `decision_steps`, one learn call per decision
+    instead of per tick (see DecisionAccumulator).
+    """
+    observations = [vec_env.observations() for vec_env in vec_envs]
+    decisions = [DecisionAccumulator(vec_env, agent.gamma) for vec_env, agent in zip(vec_envs, agents)] if decision_steps else None
+    actions = [[0] * vec_env.num_envs for vec_env in vec_envs]
+    action_interval = vec_envs[0].sims[0].action_interval
+    last_action_time = 0
+
+    for _ in range(ticks):
+        current_time = clock.tick()
+        choose_actions = current_time - last_action_time >= action_interval
+        if choose_actions:
+            last_action_time = current_time
+
+        for i, (vec_env, agent) in enumerate(zip(vec_envs, agents)):
+            if choose_actions:
+                if decisions is not None:
+                    if decisions[i].ticks > 0:
+                        states, returns, next_states, dones, discounts = decisions[i].transitions(observations[i])
+                        agent.learn_batch(states, actions[i], returns, next_states, dones, discounts=discounts)
+                    decisions[i].start(observations[i])
+                actions[i] = agent.act_batch(observations[i])
+            next_observations, rewards, dones = vec_env.step(actions[i], current_time)
+            if decisions is not None:
+                decisions[i].add(rewards, dones, next_observations)
+            else:
+                agent.learn_batch(observations[i], actions[i], rewards, next_observations, dones)
+            observations[i] = next_observations
@@ -0,0 +1,76 @@
+import bisect
+from collections import defaultdict
+from display.car import Car
+
+
+class SpatialIndex:
+    """Neighbour lookup for cars, rebuilt once per tick and updated on spawn.
+
+    Leader lookups use per-direction lanes sorted along the travel axis and
+    collision/spawn-clearance checks use a uniform grid, so each query only
+    looks at nearby cars instead of every car. Cars keep moving while the
+    index is in use (each `Car.update` moves its car), so every query is
+    widened by `slack` (the largest distance a car can move in one tick) and
+    callers still run the exact checks on the returned candidates.
+    """
+
+    def __init__(self, cell_size=50, slack=Car.MAX_SPEED):
+        self.cell_size = cell_size
+        self.slack = slack
+        self.lanes = {}
+        self.grid = defaultdict(list)
+
+    def rebuild(self, all_cars):
+        self.lanes = {}
+        self.grid = defaultdict(list)
+
+        lanes = defaultdict(list)
+        for car in all_cars:
+            lanes[car.direction].append(car)
+            self._add_to_grid(car)
+
+        for direction, cars in lanes.items():
+            cars.sort(key=lambda car: self._progress(car, direction))
+            self.lanes[direction] = ([self._progress(car, direction) for car in cars], cars)
+
+    def add(self, car):
+        keys, cars = self.lanes.setdefault(car.direction, ([], []))
+        key = self._progress(car, car.direction)
+        i = bisect.bisect_right(keys, key)
+        keys.insert(i, key)
+        cars.insert(i, car)
+        self._add_to_grid(car)
+
+    def leader_candidates(self, car, distance):
+        # Cars of the same lane whose position along the travel axis is ahead of `car`
+        lane = self.lanes.get(car.direction)
+        if lane is None:
+            return []
+        keys, cars = lane
+        key = self._progress(car, car.direction)
+        start = bisect.bisect_left(keys, key - self.slack)
+        end = bisect.bisect_right(keys, key + distance + self.slack)
+        return cars[start:end]
+
+    def nearby(self, x, y, width, height, margin=0):
+        # Cars whose box may intersect (x, y, width, height) expanded by margin
+        pad = margin + self.slack
+        found = {}
+        for cell in self._cells(x - pad, y - pad, x + width + pad, y + height + pad):
+            for car in self.grid.get(cell, ()):
+                found[id(car)] = car
+        return list(found.values())
+
+    def _add_to_grid(self, car):
+        for cell in self._cells(car.x, car.y, car.x + car.width, car.y + car.height):
+            self.grid[cell].append(car)
+
+    def _cells(self, x0, y0, x1, y1):
+        size = self.cell_size
+        for cx in range(int(x0 // size), int(x1 // size) + 1):
+            for cy in range(int(y0 // size), int(y1 // size) + 1):
+                yield (cx, cy)
+
+    @staticmethod
+    def _progress(car, direction):
+        return car.x * direction[0] + car.y * direction[1]
@@ -0,0 +1,229 @@
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from env.recorder import CsvRecorder
+from simulation.clock import SimulationClock
+from simulation.evaluation import evaluate_agent
+from agents.registry import agent_parameters, get_agent_class
+from simulation.runner import MODEL_NAMES, create_simulation, freeze_agent
+
+METRICS = ['crashes', 'avg_wait', 'exited', 'throughput_per_min', 'ticks_per_s']
+EVAL_METRICS = ['eval_throughput_per_min', 'eval_mean_wait', 'eval_p95_wait', 'eval_crashes']
+# Rank on the frozen-policy evaluation when the sweep ran one; training metrics mix in exploration
+RANKING = ('crashes', 'avg_wait')
+EVAL_RANKING = ('eval_crashes', 'eval_mean_wait')
+
+
+def load_spec(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def expand_trials(spec):
+    """
+    One trial per model, configuration and seed of a sweep spec:
+
+        {"models": ["q", "dqn"], "ticks": 20000, "seeds": 2,
+         "grid": {"env.crash_penalty": [1000, 10000], "q.alpha": [0.1, 0.3]},
+         "random": {"samples": 8, "seed": 0,
+                    "params": {"dqn.lr": {"log_uniform": [1e-4, 1e-2]},
+                               "agent.gamma": {"uniform": [0.9, 0.99]},
+                               "dqn.batch_size": {"choice": [32, 64, 128]}}}}
+
+    `env.<name>` parameters go to Environment (crash_penalty,
+    stopping_penalty, min_switch_time), `agent.<name>` to every agent and
+    `<model>.<name>` to that model's agent only. Every grid point is
+    combined with every random sample. `seeds` is a count or a list.
+    Raises ValueError for an agent parameter a model's constructor does not
+    accept, before any trial runs.
+    """
+    models = spec.get('models', list(MODEL_NAMES))
+    seeds = spec.get('seeds', 1)
+    seeds = list(range(seeds)) if isinstance(seeds, int) else seeds
+
+    trials = []
+    for model_name in models:
+        grid = {name: values for name, values in spec.get('grid', {}).items() if _applies(name, model_name)}
+        _check_agent_params(grid, model_name)
+        grid_points = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+        samples = [{}]
+        random_spec = spec.get('random')
+        if random_spec:
+            rng = random.Random(random_spec.get('seed', 0))
+            params = {name: dist for name, dist in random_spec['params'].items() if _applies(name, model_name)}
+            _check_agent_params(params, model_name)
+            samples = [{name: _sample(dist, rng) for name, dist in params.items()}
+                       for _ in range(random_spec['samples'])]
+
+        for point in grid_points:
+            for sample in samples:
+                for seed in seeds:
+                    trials.append({'id': len(trials), 'model': model_name, 'seed': seed, 'params': {**point, **sample}})
+    return trials
+
+
+def _applies(name, model_name):
+    scope = name.split('.', 1)[0]
+    return scope in ('env', 'agent', model_name)
+
+
+def _check_agent_params(names, model_name):
+    accepted = agent_parameters(model_name)
+    if accepted is None:
+        return
+    for name in names:
+        scope, key = name.split('.', 1)
+        if scope != 'env' and key not in accepted:
+            raise ValueError(f"Sweep parameter {name} is not accepted by the {model_name} agent "
+                             f"(accepted: {', '.join(sorted(accepted))})")
+
+
+def _sample(dist, rng):
+    (kind, args), = dist.items()
+    if kind == 'uniform':
+        return rng.uniform(*args)
+    if kind == 'log_uniform':
+        return math.exp(rng.uniform(math.log(args[0]), math.log(args[1])))
+    if kind == 'int_uniform':
+        return rng.randint(*args)
+    if kind == 'choice':
+        return rng.choice(args)
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def run_trial(trial, output_dir, ticks=20000, tick_ms=16, decision_steps=False, eval_episodes=0, eval_ticks=3750):
+    """
+    Worker entry point: train one model with the trial's parameters and return
+    its summary metrics. Throughput is None, and the result carries a
+    `warning`, when no car exited; such a run is too short to compare.
+    """
+    # Import the agent first: torch only gets loaded (and then seeded) for models that need it
+    get_agent_class(trial['model'])
+    seed = trial['seed']
+    random.seed(seed)
+    np.random.seed(seed)
+    if 'torch' in sys.modules:
+        # One intra-op thread per worker; the pool already uses every core
+        sys.modules['torch'].manual_seed(seed)
+        sys.modules['torch'].set_num_threads(1)
+
+    env_options, agent_options = {}, {}
+    for name, value in trial['params'].items():
+        scope, key = name.split('.', 1)
+        (env_options if scope == 'env' else agent_options)[key] = value
+
+    model_name = trial['model']
+    clock = SimulationClock(tick_ms=tick_ms)
+    log_dir = os.path.join(output_dir, "runs", str(trial['id']))
+    sim = create_simulation(model_name, clock=clock, log_dir=log_dir, agent_options=agent_options,
+                            env_options=env_options, decision_steps=decision_steps)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.update(clock.tick())
+    elapsed = time.perf_counter() - start
+    sim.close()
+
+    exited = sim.exited_cars_count
+    result = {**trial, 'crashes': sim.collision_count,
+              'avg_wait': sim.waiting_time_history[-1] if sim.waiting_time_history else 0.0,
+              'exited': exited, 'throughput_per_min': exited / (ticks * tick_ms / 60000) if exited else None,
+              'ticks_per_s': ticks / elapsed}
+    if not exited:
+        result['warning'] = f"no car exited in {ticks} ticks; increase ticks"
+    if eval_episodes:
+        report = evaluate_agent(model_name, freeze_agent(model_name, sim.agent), eval_episodes, eval_ticks,
+                                tick_ms=tick_ms, seed=seed, log_dir=os.path.join(log_dir, "eval"), env_options=env_options)
+        result.update({'eval_throughput_per_min': report['throughput_per_min'] or None, 'eval_mean_wait': report['mean_wait'],
+                       'eval_p95_wait': report['p95_wait'], 'eval_crashes': report['crashes']})
+        if not report['throughput_per_min']:
+            result.setdefault('warning', f"no car exited in {eval_ticks} evaluation ticks; increase eval_ticks")
+    return result
+
+
+def run_sweep(spec, output_dir, workers=None, progress=print):
+    """
+    Run every trial of `spec` on a pool of `workers` processes (default: one
+    per CPU) and write the results table to `output_dir/results.csv` and
+    `results.json`. The spec's `ticks`, `tick_ms`, `decision_steps`,
+    `eval_episodes` and `eval_ticks` are passed to every `run_trial`.
+    Returns the results in trial order; a failed trial keeps its error
+    message instead of metrics.
+    """
+    trials = expand_trials(spec)
+    options = {key: spec[key] for key in ('ticks', 'tick_ms', 'decision_steps', 'eval_episodes', 'eval_ticks') if key in spec}
+    os.makedirs(output_dir, exist_ok=True)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=mp.get_context('spawn')) as pool:
+        futures = {pool.submit(run_trial, trial, output_dir, **options): trial for trial in trials}
+        for future in as_completed(futures):
+            trial = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {**trial, 'error': repr(e)}
+            results.append(result)
+            if progress is not None:
+                progress(f"[{len(results)}/{len(trials)}] trial {trial['id']} ({trial['model']}, seed {trial['seed']}) "
+                         + (f"failed: {result['error']}" if 'error' in result else
+                            f"crashes {result['crashes']}, avg wait {result['avg_wait']:.1f}")
+                         + (f" (warning: {result['warning']})" if 'warning' in result else ""))
+
+    results.sort(key=lambda result: result['id'])
+    save_results(results, output_dir)
+    return results
+
+
+def save_results(results, output_dir):
+    param_names = sorted({name for result in results for name in result['params']})
+    metric_names = METRICS + (EVAL_METRICS if any('eval_crashes' in result for result in results) else [])
+    fieldnames = ['id', 'model', 'seed'] + param_names + metric_names + ['warning', 'error']
+    recorder = CsvRecorder(os.path.join(output_dir, "results.csv"), fieldnames)
+    recorder.write_rows([{'id': result['id'], 'model': result['model'], 'seed': result['seed'], **result['params'],
+                          **{name: result.get(name, '') for name in metric_names},
+                          'warning': result.get('warning', ''), 'error': result.get('error', '')}
+                         for result in results])
+    recorder.close()
+    with open(os.path.join(output_dir, "results.json"), 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def format_results(results, sort_by=None, limit=None):
+    # Best first, by crashes then average wait (lower is better); failed trials last.
+    # Without `sort_by`, the evaluation metrics rank the trials when present.
+    evaluated = any('eval_crashes' in result for result in results)
+    if sort_by is None:
+        sort_by = EVAL_RANKING if evaluated else RANKING
+    done = sorted((result for result in results if 'error' not in result),
+                  key=lambda result: tuple(result[key] for key in sort_by))
+    done += [result for result in results if 'error' in result]
+    crashes, wait, throughput = (('eval_crashes', 'eval_mean_wait', 'eval_throughput_per_min') if evaluated else
+                                 ('crashes', 'avg_wait', 'throughput_per_min'))
+    prefix = "eval " if evaluated else ""
+    lines = [f"{'id':>4} {'model':<6} {'seed':>4} {prefix + 'crashes':>13} {prefix + 'avg wait':>14} "
+             f"{prefix + 'exit/min':>14}  params"]
+    for result in done[:limit]:
+        params = " ".join(f"{name}={_format_value(value)}" for name, value in result['params'].items())
+        if 'error' in result:
+            lines.append(f"{result['id']:>4} {result['model']:<6} {result['seed']:>4} {'failed':>13} {'':>14} {'':>14}  {params}")
+        else:
+            # No throughput means no car exited: the run was too short to measure it
+            exit_rate = '-' if result[throughput] is None else f"{result[throughput]:.1f}"
+            lines.append(f"{result['id']:>4} {result['model']:<6} {result['seed']:>4} {result[crashes]:>13} "
+                         f"{result[wait]:>14.1f} {exit_rate:>14}  {params}")
+    warned = sum('warning' in result for result in results)
+    if warned:
+        lines.append(f"{warned} run(s) had no exited cars (see their warning); lengthen ticks to compare throughput")
+    return "\n".join(lines)
+
+
+def _format_value(value):
+    return f"{value:.4g}" if isinstance(value, float) else str(value)
@@ -1,17 +1,29 @@
+import os
 import pygame
 import sys
 from display.car_spawner import CarSpawner
 from display.road import Road, Direction
 from display.traffic_light import TrafficLight, Light
 from display.car import Car
+from display.car_sprites import car_sprites
+from env.metric_series import MetricSeries
 
 class TrafficSimulation:
-    def __init__(self, agent, env, actions, width=400, height=600):
+    def __init__(self, agent, env, actions, width=400, height=600, spatial_index=None, trajectory_log=None,
+                 metrics_dir=None, profiler=None, decision_steps=False, learning=True):
         self.agent = agent
         self.env = env
         self.actions_map = actions
         self.width = width
         self.height = height
+        # Optional SpatialIndex for neighbour queries (car-following, collisions, spawn clearance)
+        self.spatial_index = spatial_index
+        # Optional TrajectoryWriter recording one row per tick
+        self.trajectory_log = trajectory_log
+        # Optional PhaseProfiler timing each phase of update(); shared with env so env.step is broken down too
+        self.profiler = profiler
+        if profiler is not None:
+            self.env.profiler = profiler
         
 
         self.roads = []
@@ -25,6 +37,10 @@ class TrafficSimulation:
         self.green = (100, 200, 70)
 
         self._init_assets()
+        # Ground and roads, rendered once (see get_background)
+        self.background = None
+        # Rects of the cars and lights drawn last frame, for draw_dirty
+        self.dirty_rects = None
         
 
         self.state = self.env.reset(self.all_cars, self.traffic_lights, self.roads)
@@ -34,17 +50,33 @@ class TrafficSimulation:
         self.last_action_time = 0
         self.action_interval = 200
         self.action_index = 0
+        # Episode id, incremented whenever the environment reports done (a crash)
+        self.episode = 0
+        # With decision_steps, the agent learns one transition per decision (semi-MDP) instead of one per tick:
+        # the ticks an action is held for add up to a discounted reward, and the next state is bootstrapped
+        # with gamma^ticks
+        self.decision_steps = decision_steps
+        self.decision_reward = 0.0
+        self.decision_discount = 1.0
+        self.decision_ticks = 0
+        # Without learning (evaluation), agent.learn is never called
+        self.learning = learning
         
 
         self.collision_count = 0
         # waiting_time_history stores cumulative average waiting time per frame
-        self.waiting_time_history = []
         # collision_history stores cumulative collision count per frame
-        self.collision_history = []
+        # With metrics_dir, both spill to disk instead of growing in memory
+        self.waiting_time_history = MetricSeries(os.path.join(metrics_dir, "waiting_time") if metrics_dir else None)
+        self.collision_history = MetricSeries(os.path.join(metrics_dir, "collisions") if metrics_dir else None)
         
         # Cumulative/Global stats tracking
         self.completed_cars_wait_sum = 0
         self.completed_cars_count = 0
+        # Cars removed after reaching a road's end area
+        self.exited_cars_count = 0
+        # Optional list receiving the waiting_duration of every removed car (for wait percentiles)
+        self.completed_waits = None
 
     def _init_assets(self):
         road_width = 25
@@ -70,21 +102,117 @@ class TrafficSimulation:
         self.car_spawners = [car_spawner1, car_spawner2]
 
 
-        traffic_light_horizontal = TrafficLight(self.width // 2 - road_width, self.height // 2, horizontal_road_small)
-        traffic_light_vertical = TrafficLight(self.width // 2, self.height // 2 - road_width, vertical_road_small)
+        traffic_light_horizontal = TrafficLight(self.width // 2 - road_width, self.height // 2, horizontal_road_small, clock=self.env.clock)
+        traffic_light_vertical = TrafficLight(self.width // 2, self.height // 2 - road_width, vertical_road_small, clock=self.env.clock)
         self.traffic_lights = [traffic_light_horizontal, traffic_light_vertical]
         self.all_cars = []
 
+    def get_background(self, surface):
+        if self.background is None or self.background.get_size() != surface.get_size():
+            background = pygame.Surface(surface.get_size()).convert(surface)
+            background.fill(self.light_gray)
+            for road in filter(lambda road: road.main_road, self.roads):
+                road.draw(background)
+            self.background = background
+        return self.background
+
     def draw(self, surface):
-        surface.fill(self.light_gray)
-        for road in filter(lambda road: road.main_road, self.roads):
-            road.draw(surface)
-        for traffic_light in self.traffic_lights:
-            traffic_light.draw(surface)
-        for car in self.all_cars:
-            car.draw(surface)
+        surface.blit(self.get_background(surface), (0, 0))
+        self.dirty_rects = self._draw_dynamic(surface)
+
+    def draw_dirty(self, surface):
+        """
+        Redraw only what can have changed since the last draw: restore the
+        background under last frame's cars and lights, then draw the current
+        ones. Returns the changed rects, in `surface` coordinates.
+        """
+        if self.dirty_rects is None:
+            self.draw(surface)
+            return [surface.get_rect()]
+
+        background = self.get_background(surface)
+        erased = self.dirty_rects
+        surface.blits([(background, rect, rect) for rect in erased], doreturn=False)
+        self.dirty_rects = self._draw_dynamic(surface)
+        return erased + self.dirty_rects
+
+    def _draw_dynamic(self, surface):
+        rects = [traffic_light.draw(surface) for traffic_light in self.traffic_lights]
+        return rects + car_sprites.draw(surface, self.all_cars)
+
+    def update(self, current_time=None):
+        if current_time is None:
+            current_time = self.env.clock.get_ticks()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_tick()
+
+        self.prepare_tick(current_time)
+        if self.decision_steps:
+            self.update_decision(current_time)
+            return
+
+        # Agent Action
+        if current_time - self.last_action_time >= self.action_interval:
+            self.action_index = self.agent.act(self.hashable_state)
+            self.last_action_time = current_time
+            if profiler is not None:
+                profiler.lap('act')
+
+        hashable_next_state, reward, done = self.step_environment(current_time)
+
+        if self.learning:
+            self.agent.learn(self.hashable_state, self.action_index, reward, hashable_next_state, done)
+            if profiler is not None:
+                profiler.lap('learn')
+        
+        self.hashable_state = hashable_next_state
+
+        self.update_statistics()
+        if profiler is not None:
+            profiler.lap('statistics')
+            profiler.end_tick()
 
-    def update(self, current_time):
+    def update_decision(self, current_time):
+        profiler = self.profiler
+        if self.decision_ticks == 0 or current_time - self.last_action_time >= self.action_interval:
+            if self.decision_ticks > 0:
+                # Close the previous decision at the state it led to
+                hashable_next_state = self.env.get_hashable_state(self.state)
+                self.learn_decision(hashable_next_state, False)
+                if profiler is not None:
+                    profiler.lap('learn')
+            self.action_index = self.agent.act(self.hashable_state)
+            self.last_action_time = current_time
+            if profiler is not None:
+                profiler.lap('act')
+
+        _, reward, done = self.step_environment(current_time, encode=False)
+        if self.learning:
+            self.decision_reward += self.decision_discount * reward
+            self.decision_discount *= self.agent.gamma
+        self.decision_ticks += 1
+        if done:
+            # A crash ends the decision early; the next tick decides again
+            self.learn_decision(self.env.get_hashable_state(self.state), True)
+            if profiler is not None:
+                profiler.lap('learn')
+
+        self.update_statistics()
+        if profiler is not None:
+            profiler.lap('statistics')
+            profiler.end_tick()
+
+    def learn_decision(self, hashable_next_state, done):
+        if self.learning:
+            self.agent.learn(self.hashable_state, self.action_index, self.decision_reward, hashable_next_state, done,
+                             discount=self.decision_discount)
+        self.hashable_state = hashable_next_state
+        self.decision_reward = 0.0
+        self.decision_discount = 1.0
+        self.decision_ticks = 0
+
+    def prepare_tick(self, current_time):
         # Filter Cars (Remove finished/crashed) and update cumulative stats
         active_cars = []
         for car in self.all_cars:
@@ -95,30 +223,43 @@ class TrafficSimulation:
                 # Count its waiting time towards history
                 self.completed_cars_wait_sum += car.waiting_duration
                 self.completed_cars_count += 1
+                if car.reached_end:
+                    self.exited_cars_count += 1
+                if self.completed_waits is not None:
+                    self.completed_waits.append(car.waiting_duration)
         
         self.all_cars = active_cars
+        if self.spatial_index is not None:
+            self.spatial_index.rebuild(self.all_cars)
+        if self.profiler is not None:
+            self.profiler.lap('filter')
 
 
         for spawner in self.car_spawners:
-            spawner.spawn_car(current_time, self.all_cars)
-
-        # Agent Action
-        if current_time - self.last_action_time >= self.action_interval:
-            self.action_index = self.agent.act(self.hashable_state)
-            self.last_action_time = current_time
-        
+            spawner.spawn_car(current_time, self.all_cars, self.spatial_index)
+        if self.profiler is not None:
+            self.profiler.lap('spawn')
 
+    def step_environment(self, current_time, encode=True):
         action = self.actions_map[self.action_index]
 
         # Environment Step
-        next_state, reward, done = self.env.step(action, self.all_cars, self.traffic_lights, self.roads)
-        hashable_next_state = self.env.get_hashable_state(next_state)
+        next_state, reward, done = self.env.step(action, self.all_cars, self.traffic_lights, self.roads, self.spatial_index)
+        self.state = next_state
+        hashable_next_state = self.env.get_hashable_state(next_state) if encode else None
+        if self.profiler is not None:
+            self.profiler.lap('encode')
 
+        if self.trajectory_log is not None:
+            self.trajectory_log.append(current_time, self.episode, self.action_index, reward, done, next_state)
+            if self.profiler is not None:
+                self.profiler.lap('trajectory')
+        if done:
+            self.episode += 1
 
-        self.agent.learn(self.hashable_state, self.action_index, reward, hashable_next_state, done)
-        
-        self.hashable_state = hashable_next_state
+        return hashable_next_state, reward, done
 
+    def update_statistics(self):
         # Update Statistics
         # Count new crashes (cars that are crashed but not yet removed)
         new_crashes = len([car for car in self.all_cars if car.crashed])
@@ -139,5 +280,11 @@ class TrafficSimulation:
             
         # Collision History
         self.collision_history.append(self.collision_count)
-    
-        # No history truncation (sliding window) as requested
+
+    def close(self):
+        self.agent.close()
+        self.env.close()
+        self.waiting_time_history.close()
+        self.collision_history.close()
+        if self.trajectory_log is not None:
+            self.trajectory_log.close()
@@ -0,0 +1,30 @@
+import random
+import numpy as np
+from simulation.clock import SimulationClock
+from simulation.runner import create_simulation
+
+
+def run(log_dir, seed, ticks, **options):
+    random.seed(seed)
+    np.random.seed(seed)
+    clock = SimulationClock(tick_ms=16)
+    sim = create_simulation('q', clock=clock, log_dir=str(log_dir), **options)
+    cars = []
+    for _ in range(ticks):
+        sim.update(clock.tick())
+        cars.append([(car.x, car.y, car.speed_x, car.speed_y, car.waiting_duration, car.crashed) for car in sim.all_cars])
+    sim.close()
+    return cars, sim.collision_count, sim.exited_cars_count, list(sim.waiting_time_history)
+
+
+def test_vectorized_engine_matches_python_engine(tmp_path):
+    cars, crashes, exited, waits = run(tmp_path / "python", 3, 3000)
+    vectorized = run(tmp_path / "vectorized", 3, 3000, vectorized=True)
+
+    # The seed produces red-light queues, followers and crashes, so every rule is exercised
+    assert crashes > 0 and exited > 0
+    assert vectorized[1:3] == (crashes, exited)
+    for tick, (expected, actual) in enumerate(zip(cars, vectorized[0])):
+        assert len(actual) == len(expected), tick
+        assert np.allclose(np.array(actual, dtype=float), np.array(expected, dtype=float)), tick
+    assert np.allclose(vectorized[3], waits)
@@ -0,0 +1,25 @@
+import os
+import pytest
+
+pygame = pytest.importorskip("pygame")
+from display.car_sprites import CarSprites
+
+
+def test_sprites_built_before_the_display_get_converted():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.quit()
+    sprites = CarSprites()
+    early = sprites.get(40, 20, (255, 0, 0), 90)
+    assert early.get_size() == (20, 40) and sprites.unconverted
+
+    pygame.display.init()
+    try:
+        screen = pygame.display.set_mode((100, 100))
+        converted = sprites.get(40, 20, (255, 0, 0), 90)
+        assert converted is not early and not sprites.unconverted
+        assert converted.get_bitsize() == screen.get_bitsize()
+        assert sprites.get(40, 20, (255, 0, 0), 90) is converted
+        assert sprites.get(40, 20, (0, 255, 0), 0) is sprites.get(40, 20, (0, 255, 0), 0)
+        assert not sprites.unconverted
+    finally:
+        pygame.display.quit()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from agents.q_agent import QLearningAgent
+from simulation.clock import SimulationClock
+from simulation.runner import create_simulation
+
+
+class RecordingAgent(QLearningAgent):
+    def __init__(self):
+        super().__init__(actions=range(4), gamma=0.9, epsilon=0.0)
+        self.transitions = []
+
+    def learn(self, state, action, reward, next_state, done, discount=None):
+        self.transitions.append((reward, done, discount))
+        super().learn(state, action, reward, next_state, done, discount)
+
+
+def test_decision_transitions_bootstrap_with_gamma_to_the_ticks(tmp_path):
+    clock = SimulationClock(tick_ms=16)
+    agent = RecordingAgent()
+    sim = create_simulation('q', clock=clock, log_dir=str(tmp_path), agent=agent, decision_steps=True)
+    for _ in range(500):
+        sim.update(clock.tick())
+    sim.close()
+
+    # 200 ms decisions on a 16 ms tick: 13 ticks each, unless a crash ends one early
+    full = [discount for reward, done, discount in agent.transitions if not done]
+    assert len(full) > 30
+    assert all(discount == pytest.approx(0.9 ** 13) for discount in full)
+
+
+def test_q_learning_uses_transition_discount():
+    agent = QLearningAgent(actions=range(2), alpha=1.0, gamma=0.9, epsilon=0.0)
+    row = agent.q_table.intern("s1")
+    agent.q_table.values[row] = (2.0, 0.0)
+    agent.learn("s0", 0, 1.0, "s1", False, discount=0.5)
+    assert agent.get_q_value("s0", 0) == 1.0 + 0.5 * 2.0
+    agent.learn("s0", 1, 1.0, "s1", False)
+    assert agent.get_q_value("s0", 1) == pytest.approx(1.0 + 0.9 * 2.0)
+
+
+def test_dqn_target_uses_stored_discounts():
+    torch = pytest.importorskip("torch")
+    from agents.dqn_agent import DQNAgent
+    agent = DQNAgent(state_size=3, action_size=2, gamma=0.9, batch_size=4)
+    states = np.eye(3, dtype=np.float32)[[0, 1, 2, 0]]
+    agent.memory.add_batch(states, [0, 1, 0, 1], [1.0] * 4, states, [0, 0, 0, 1], discounts=[0.5, 0.5, 0.25, 0.5])
+    agent.memory.add(states[0], 0, 1.0, states[1], False)
+    assert agent.memory.discounts[:5].tolist() == pytest.approx([0.5, 0.5, 0.25, 0.5, 0.9])
+
+    batch = agent.memory.gather(np.arange(4))
+    with torch.no_grad():
+        next_qs = agent.target_model(batch[3]).max(dim=1)[0]
+    qs_before = agent.model(batch[0]).detach()
+    captured = {}
+
+    def criterion(qs, target_qs):
+        captured['target'] = target_qs
+        return ((qs - target_qs) ** 2).mean()
+
+    agent.criterion = criterion
+    agent.train_on_batch(batch)
+    expected = 1.0 + torch.tensor([0.5, 0.5, 0.25, 0.5]) * next_qs * torch.tensor([1.0, 1.0, 1.0, 0.0])
+    target = captured['target']
+    assert torch.allclose(target[range(4), batch[1]], expected)
+    assert torch.allclose(target[range(4), 1 - batch[1]], qs_before[range(4), 1 - batch[1]])
@@ -0,0 +1,85 @@
+import random
+import numpy as np
+import pytest
+from display.car import Car
+from display.road import Direction
+from env.environment import Environment
+from simulation.car_engine import VectorizedCarEngine
+from simulation.clock import SimulationClock
+from simulation.runner import create_simulation
+
+
+def road_counts(all_cars, main_roads):
+    # Reference: one Road.count_cars / count_cars_at_end pass per road, as get_state did before fusing
+    for car in all_cars:
+        car.reached_end = False
+    stopping = [road.count_cars(all_cars, calculate_waiting_durations=Environment.dif_penalty_for_wait)
+                for road in main_roads]
+    at_end = [road.count_cars_at_end(all_cars) for road in main_roads]
+    crashed = sum(car.crashed for car in all_cars)
+    return (stopping, at_end, crashed), [car.reached_end for car in all_cars]
+
+
+def fused_counts(count, all_cars, *args):
+    for car in all_cars:
+        car.reached_end = False
+    return count(*args), [car.reached_end for car in all_cars]
+
+
+def random_cars(rng, main_roads, n):
+    # Cars spread over the main roads, their stopping and end areas included, half of them stopped
+    cars = []
+    for _ in range(n):
+        road = rng.choice(main_roads)
+        x = rng.uniform(min(road.start_x, road.end_x) - 20, max(road.start_x, road.end_x) + 20)
+        y = rng.uniform(min(road.start_y, road.end_y) - 20, max(road.start_y, road.end_y) + 20)
+        if road.direction == Direction.HORIZONTAL:
+            car = Car(x, y, 20, 10, (255, 0, 0), 2, 0)
+        else:
+            car = Car(x, y, 20, 10, (255, 0, 0), 0, 2)
+        if rng.random() < 0.5:
+            car.speed_x = car.speed_y = 0
+        car.waiting_duration = rng.randrange(100)
+        car.crashed = rng.random() < 0.1
+        cars.append(car)
+    return cars
+
+
+@pytest.mark.parametrize("dif_penalty_for_wait", [True, False])
+def test_fused_counts_match_road_counts(tmp_path, monkeypatch, dif_penalty_for_wait):
+    monkeypatch.setattr(Environment, 'dif_penalty_for_wait', dif_penalty_for_wait)
+    sim = create_simulation('q', clock=SimulationClock(), log_dir=str(tmp_path))
+    main_roads = [road for road in sim.roads if road.main_road]
+    rng = random.Random(0)
+    for n in (0, 1, 10, 200):
+        cars = random_cars(rng, main_roads, n)
+        expected = road_counts(cars, main_roads)
+        assert fused_counts(sim.env.count_cars, cars, cars, main_roads) == expected
+
+        engine = VectorizedCarEngine()
+        engine.load(cars)
+        engine.speed_x = np.array([car.speed_x for car in cars], dtype=float)
+        engine.speed_y = np.array([car.speed_y for car in cars], dtype=float)
+        assert fused_counts(sim.env.count_cars_vectorized, cars, engine, cars, main_roads) == expected
+    sim.close()
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_state_counts_match_road_counts_during_a_run(tmp_path, monkeypatch, vectorized):
+    # Take the NumPy path from the first car on, so the vectorized run exercises it
+    monkeypatch.setattr(Environment, 'vectorized_count_min_cars', 1)
+    random.seed(1)
+    np.random.seed(1)
+    clock = SimulationClock(tick_ms=16)
+    sim = create_simulation('q', clock=clock, log_dir=str(tmp_path), vectorized=vectorized)
+    main_roads = [road for road in sim.roads if road.main_road]
+    stopped_counts = 0
+    for _ in range(1500):
+        sim.update(clock.tick())
+        state = sim.env.get_state(sim.all_cars, sim.traffic_lights, sim.roads, car_engine=sim.env.car_engine)
+        (stopping, at_end, crashed), _ = road_counts(sim.all_cars, main_roads)
+        assert (state['cars_in_stopping_areas'], state['cars_at_end_areas'], state['num_crashed']) == \
+            (stopping, at_end, crashed)
+        stopped_counts += sum(stopping) > 0
+    assert stopped_counts > 0
+    sim.close()
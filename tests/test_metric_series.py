@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from env.metric_series import MetricSeries
+
+
+def brute_force_downsample(samples, max_points, method, fanout):
+    # Group the raw samples the way downsample does: whole buckets of the widest
+    # fanout^k samples that still fit in one output point, binned by their start
+    samples = np.asarray(samples, dtype=np.float64)
+    if len(samples) <= max_points:
+        return samples
+    samples_per_point = len(samples) / max_points
+    size = 1
+    while size * fanout <= samples_per_point:
+        size *= fanout
+    bins = ((np.arange(len(samples)) // size) * size / samples_per_point).astype(np.int64)
+    reduce = {'avg': np.mean, 'max': np.max, 'min': np.min}[method]
+    return np.array([reduce(samples[bins == b]) for b in np.unique(bins)])
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 100, 255, 256, 257, 1000, 4099])
+@pytest.mark.parametrize("fanout", [2, 4])
+def test_downsample_matches_brute_force(count, fanout):
+    samples = np.random.default_rng(count).normal(size=count).cumsum()
+    series = MetricSeries(fanout=fanout, chunk_size=64)
+    for value in samples:
+        series.append(value)
+
+    for max_points in (1, 3, 50, 200, 5000):
+        for method in ('avg', 'max', 'min'):
+            expected = brute_force_downsample(samples, max_points, method, fanout)
+            actual = series.downsample(max_points, method)
+            assert len(actual) <= max(max_points, 1)
+            assert np.allclose(actual, expected), (max_points, method)
+
+
+def test_spilled_series_matches_in_memory(tmp_path):
+    samples = np.random.default_rng(0).random(3000)
+    in_memory, spilled = MetricSeries(chunk_size=64), MetricSeries(spill_dir=str(tmp_path), chunk_size=64)
+    for value in samples:
+        in_memory.append(value)
+        spilled.append(value)
+
+    assert len(spilled) == len(samples) and spilled.max() == samples.max()
+    assert spilled[0] == samples[0] and spilled[-1] == samples[-1] and spilled[1234] == samples[1234]
+    for method in ('avg', 'max', 'min'):
+        assert np.array_equal(spilled.downsample(300, method), in_memory.downsample(300, method))
+    spilled.close()
+    assert np.array_equal(np.fromfile(tmp_path / "level0.bin"), samples)
+
+
+def test_indexing_and_unknown_method():
+    series = MetricSeries()
+    assert not series and series.max() is None
+    for value in (3, 1, 2):
+        series.append(value)
+    assert series and series[1] == 1 and series[-1] == 2 and series.max() == 3
+    with pytest.raises(IndexError):
+        series[3]
+    with pytest.raises(ValueError):
+        series.downsample(1, 'median')
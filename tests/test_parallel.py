@@ -0,0 +1,29 @@
+import os
+from simulation.parallel import SEQ, TICKS, SharedSimState, SharedSimView
+
+
+def test_snapshot_skips_writes_in_progress():
+    state = SharedSimState()
+    try:
+        state.array[TICKS] = 7
+        assert state.snapshot()[TICKS] == 7
+        state.array[SEQ] = 1
+        assert state.snapshot(retries=3) is None
+        state.array[SEQ] = 2
+        assert state.snapshot()[TICKS] == 7
+    finally:
+        state.close()
+        state.unlink()
+
+
+def test_view_writes_no_files_to_the_working_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    state = SharedSimState()
+    try:
+        view = SharedSimView(state)
+        view.poll()
+        view.close()
+    finally:
+        state.close()
+        state.unlink()
+    assert os.listdir(tmp_path) == []
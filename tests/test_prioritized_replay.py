@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+from agents.prioritized_replay import PrioritizedReplayBuffer, SumTree
+
+
+def brute_force_find(priorities, values):
+    # Index of the first leaf whose cumulative priority exceeds each value
+    return np.searchsorted(np.cumsum(priorities), values, side='right')
+
+
+@pytest.mark.parametrize("capacity", [1, 5, 8, 100])
+def test_find_matches_cumulative_sum(capacity):
+    rng = np.random.default_rng(capacity)
+    tree = SumTree(capacity)
+    priorities = rng.random(capacity) + 0.01
+    tree.update(np.arange(capacity), priorities)
+    assert tree.total() == pytest.approx(priorities.sum())
+
+    values = np.sort(rng.random(500)) * priorities.sum()
+    assert np.array_equal(tree.find(values), brute_force_find(priorities, values))
+
+    # Range boundaries go to the leaf on the right; integer priorities keep the sums exact
+    priorities = rng.integers(1, 10, capacity).astype(float)
+    tree.update(np.arange(capacity), priorities)
+    boundaries = np.concatenate([[0.0], np.cumsum(priorities)[:-1]])
+    assert np.array_equal(tree.find(boundaries), np.arange(capacity))
+
+
+def test_update_keeps_sums_consistent():
+    rng = np.random.default_rng(0)
+    tree = SumTree(13)
+    priorities = np.zeros(13)
+    for _ in range(50):
+        indices = rng.choice(13, size=rng.integers(1, 6), replace=False)
+        priorities[indices] = rng.random(len(indices))
+        tree.update(indices, priorities[indices])
+        assert tree.total() == pytest.approx(priorities.sum())
+        assert np.allclose(tree.leaves(np.arange(13)), priorities)
+        # Every internal node is the sum of its children
+        nodes = np.arange(1, tree.size)
+        assert np.allclose(tree.tree[nodes], tree.tree[2 * nodes] + tree.tree[2 * nodes + 1])
+
+    values = rng.random(200) * priorities.sum()
+    assert np.array_equal(tree.find(values), brute_force_find(priorities, values))
+
+
+def test_find_skips_zero_priority_leaves():
+    tree = SumTree(6)
+    priorities = np.array([0.0, 1.0, 0.0, 0.0, 2.0, 0.0])
+    tree.update(np.arange(6), priorities)
+    assert set(tree.find(np.linspace(0, 3, 50, endpoint=False)).tolist()) == {1, 4}
+
+
+def filled_buffer(alpha=0.6, beta=0.4, beta_increment=0.1):
+    buffer = PrioritizedReplayBuffer(10, 2, alpha=alpha, beta=beta, beta_increment=beta_increment,
+                                     rng=np.random.default_rng(0))
+    for i in range(10):
+        buffer.add(np.full(2, i), 0, float(i), np.full(2, i), False)
+    return buffer
+
+
+def test_importance_sampling_weights():
+    buffer = filled_buffer()
+    td_errors = np.linspace(0.1, 5.0, 10)
+    buffer.update_priorities(np.arange(10), td_errors)
+    priorities = (np.abs(td_errors) + buffer.epsilon) ** buffer.alpha
+
+    for beta in (0.4, 0.5, 0.6):
+        assert buffer.beta == pytest.approx(beta)
+        _, _, rewards, _, _, _, weights, indices = buffer.sample(6)
+        assert np.array_equal(rewards.numpy(), indices.astype(np.float32))
+        expected = (10 * priorities[indices] / priorities.sum()) ** -beta
+        assert np.allclose(weights.numpy(), expected / expected.max())
+        assert weights.max() == pytest.approx(1.0)
+
+
+def test_new_transitions_get_max_priority():
+    buffer = filled_buffer(alpha=1.0)
+    buffer.update_priorities(np.array([0, 1]), np.array([3.0, 0.5]))
+    assert buffer.max_priority == pytest.approx(3.0 + buffer.epsilon)
+    i = buffer.add(np.zeros(2), 0, 0.0, np.zeros(2), False)
+    assert buffer.tree.leaves([i])[0] == pytest.approx(3.0 + buffer.epsilon)
+
+
+def test_sampling_follows_priorities():
+    buffer = filled_buffer(alpha=1.0)
+    buffer.update_priorities(np.arange(10), np.array([0.0] * 8 + [1.0, 3.0]))
+    counts = np.bincount(np.concatenate([buffer.sample_indices(8) for _ in range(500)]), minlength=10)
+    assert counts[:8].sum() < 0.01 * counts.sum()
+    assert 2.5 < counts[9] / counts[8] < 3.5
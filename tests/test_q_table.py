@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from agents.q_agent import QLearningAgent
+from agents.q_table import QTable
+from agents.sarsa_agent import SARSAAgent
+
+
+def states(n):
+    return [((i % 7, i // 7), ((175, 200, 1 + i % 2, i % 60),)) for i in range(n)]
+
+
+def test_intern_assigns_stable_rows_and_grows():
+    table = QTable(4, initial_capacity=2)
+    rows = [table.intern(state) for state in states(10)]
+    assert rows == list(range(10))
+    assert len(table) == 10 and len(table.values) >= 10
+    assert table.intern(states(10)[3]) == 3
+    assert table.lookup(("unseen",)) is None
+
+
+def test_grow_keeps_values():
+    table = QTable(2, initial_capacity=1)
+    for i, state in enumerate(states(5)):
+        row = table.intern(state)
+        table.values[row] = (i, -i)
+    for i, state in enumerate(states(5)):
+        assert table.get(state, 0) == i and table.get(state, 1) == -i
+
+
+def test_row_values_past_initial_capacity():
+    table = QTable(4, initial_capacity=4)
+    for state in states(9):
+        assert table.row_values(state).shape == (4,)
+
+
+def test_agents_act_and_learn_past_1024_states():
+    # Interning a new state in act/learn must not index the array from before it grew
+    for agent_class in (SARSAAgent, QLearningAgent):
+        agent = agent_class(actions=range(4), epsilon=0)
+        seen = states(1500)
+        for state in seen:
+            assert 0 <= agent.act(state) < 4
+        assert len(agent.q_table) == 1500
+
+        agent = agent_class(actions=range(4), epsilon=0)
+        for state, next_state in zip(seen, seen[1:]):
+            agent.learn(state, agent.act(state), -1.0, next_state, False)
+        assert len(agent.q_table) == 1500
+        assert agent.q_table.values[:1499].min(axis=1).max() < 0
+
+
+def filled_table(n):
+    table = QTable(3, initial_capacity=4)
+    for i, state in enumerate(states(n)):
+        row = table.intern(state)
+        table.values[row] = (i, 0.5 * i, -i)
+    return table
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    table = filled_table(37)
+    table.save(tmp_path)
+    loaded = QTable.load(tmp_path, mmap=mmap)
+
+    assert loaded.num_actions == 3 and len(loaded) == 37
+    assert loaded.states == table.states
+    assert all(loaded.lookup(state) == table.lookup(state) for state in table.states)
+    assert np.array_equal(loaded.values, table.values[:37])
+
+
+def test_loaded_table_grows_and_saves_over_its_own_checkpoint(tmp_path):
+    filled_table(10).save(tmp_path)
+    loaded = QTable.load(tmp_path)
+    row = loaded.intern(states(11)[10])
+    loaded.values[row] = (10, 5, -10)
+    loaded.values[0, 0] = 99
+    loaded.save(tmp_path)
+
+    reloaded = QTable.load(tmp_path)
+    assert len(reloaded) == 11
+    assert reloaded.get(states(11)[10], 0) == 10 and reloaded.get(states(1)[0], 0) == 99
+
+
+def test_save_load_empty_table(tmp_path):
+    QTable(2).save(tmp_path)
+    loaded = QTable.load(tmp_path)
+    assert len(loaded) == 0
+    assert loaded.row_values(states(1)[0]).tolist() == [0, 0]
+
+
+def test_save_rejects_mixed_state_structures(tmp_path):
+    table = QTable(2)
+    table.intern((1, 2))
+    table.intern((1, (2, 3)))
+    with pytest.raises(ValueError):
+        table.save(tmp_path)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+from agents.replay_buffer import ReplayBuffer
+
+
+def transition(i):
+    return np.full(3, i, dtype=np.float32), i % 4, float(i), np.full(3, i + 1, dtype=np.float32), i % 5 == 0
+
+
+def test_add_wraps_around_and_overwrites_oldest():
+    buffer = ReplayBuffer(5, 3)
+    for i in range(12):
+        assert buffer.add(*transition(i)) == i % 5
+    assert len(buffer) == 5 and buffer.position == 12 % 5
+    # Slots hold the last five transitions, slot j the one added at j (mod 5)
+    assert sorted(buffer.rewards.tolist()) == [7, 8, 9, 10, 11]
+    for j in range(5):
+        i = int(buffer.rewards[j])
+        assert i % 5 == j
+        assert (buffer.states[j] == i).all() and (buffer.next_states[j] == i + 1).all()
+        assert buffer.actions[j] == i % 4 and buffer.dones[j] == (i % 5 == 0)
+
+
+def test_add_batch_across_the_end_matches_single_adds():
+    single, batched = ReplayBuffer(7, 3, discount=0.9), ReplayBuffer(7, 3, discount=0.9)
+    for i in range(5):
+        single.add(*transition(i))
+        batched.add(*transition(i))
+    batch = [transition(i) for i in range(5, 10)]
+    discounts = [0.5, None, 0.25, None, 0.125]
+    for t, discount in zip(batch, discounts):
+        single.add(*t, discount=discount)
+    indices = batched.add_batch(*map(np.array, zip(*batch)),
+                                discounts=[0.9 if discount is None else discount for discount in discounts])
+
+    assert indices.tolist() == [5, 6, 0, 1, 2]
+    assert (batched.position, len(batched)) == (single.position, len(single)) == (3, 7)
+    for name, expected in single.state_arrays().items():
+        assert np.array_equal(batched.state_arrays()[name], expected), name
+
+
+def test_sample_gathers_distinct_stored_rows():
+    buffer = ReplayBuffer(8, 3, rng=np.random.default_rng(0))
+    for i in range(20):
+        buffer.add(*transition(i), discount=0.5 ** (i % 3))
+    states, actions, rewards, next_states, dones, discounts = buffer.sample(8)
+    assert sorted(rewards.tolist()) == list(range(12, 20))
+    for state, action, reward, next_state, discount in zip(states, actions, rewards, next_states, discounts):
+        i = int(reward)
+        assert (state == i).all() and (next_state == i + 1).all() and action == i % 4
+        assert discount == 0.5 ** (i % 3)
+
+
+def test_save_load_round_trip(tmp_path):
+    buffer = ReplayBuffer(4, 3)
+    for i in range(6):
+        buffer.add(*transition(i))
+    buffer.save(tmp_path / "replay.npz")
+
+    restored = ReplayBuffer(4, 3)
+    restored.load(tmp_path / "replay.npz")
+    assert (restored.position, len(restored)) == (buffer.position, len(buffer))
+    for name, expected in buffer.state_arrays().items():
+        assert np.array_equal(restored.state_arrays()[name], expected), name
+    with pytest.raises(ValueError):
+        ReplayBuffer(5, 3).load(tmp_path / "replay.npz")
@@ -0,0 +1,27 @@
+import numpy as np
+from agents.sarsa_agent import SARSAAgent
+
+
+def test_act_batch_uses_each_envs_pending_action():
+    np.random.seed(0)
+    agent = SARSAAgent(actions=range(4), epsilon=1.0)  # random next actions, so envs disagree
+    num_envs = 8
+    states = [((i, 0), ()) for i in range(num_envs)]
+    next_states = [((i, 1), ()) for i in range(num_envs)]
+
+    agent.learn_batch(states, [0] * num_envs, [-1.0] * num_envs, next_states, [False] * num_envs)
+    pending = dict(agent.next_actions)
+    assert sorted(pending) == list(range(num_envs))
+    assert len(set(pending.values())) > 1
+
+    assert agent.act_batch(next_states) == [pending[i] for i in range(num_envs)]
+    assert agent.next_actions == {}
+
+
+def test_update_bootstraps_from_returned_action():
+    agent = SARSAAgent(actions=range(2), alpha=1.0, gamma=0.5, epsilon=0.0)
+    row = agent.q_table.intern("s1")
+    agent.q_table.values[row] = (0.0, 4.0)
+    next_action = agent.update("s0", 0, 1.0, "s1", False)
+    assert next_action == 1
+    assert agent.get_q_value("s0", 0) == 1.0 + 0.5 * 4.0
@@ -0,0 +1,59 @@
+import random
+from display.car import Car
+from simulation.spatial_index import SpatialIndex
+
+DIRECTIONS = [(2, 0), (-2, 0), (0, 2), (0, -2)]
+
+
+def random_cars(rng, n):
+    cars = []
+    for _ in range(n):
+        speed_x, speed_y = rng.choice(DIRECTIONS)
+        cars.append(Car(rng.uniform(0, 400), rng.uniform(0, 400), 20, 10, (255, 0, 0), speed_x, speed_y))
+    return cars
+
+
+def brute_force_nearby(cars, x, y, width, height, margin):
+    return {id(car) for car in cars
+            if x - margin < car.x + car.width and x + width + margin > car.x and
+            y - margin < car.y + car.height and y + height + margin > car.y}
+
+
+def test_nearby_finds_every_overlapping_car():
+    rng = random.Random(0)
+    cars = random_cars(rng, 200)
+    for slack in (0, Car.MAX_SPEED):
+        index = SpatialIndex(cell_size=50, slack=slack)
+        index.rebuild(cars)
+        for _ in range(300):
+            x, y = rng.uniform(-20, 420), rng.uniform(-20, 420)
+            width, height = rng.choice([(20, 10), (10, 20), (1, 1)])
+            margin = rng.choice([0, 15])
+            found = {id(car) for car in index.nearby(x, y, width, height, margin)}
+            assert brute_force_nearby(cars, x, y, width, height, margin) <= found
+            # Candidates stay local: within the query box grown by margin, slack and one grid cell
+            pad = margin + slack + index.cell_size
+            assert found <= brute_force_nearby(cars, x, y, width, height, pad)
+
+
+def test_nearby_includes_cars_added_after_rebuild():
+    rng = random.Random(1)
+    cars = random_cars(rng, 50)
+    index = SpatialIndex()
+    index.rebuild(cars[:25])
+    for car in cars[25:]:
+        index.add(car)
+    for car in cars:
+        assert brute_force_nearby(cars, car.x, car.y, car.width, car.height, 0) <= \
+            {id(other) for other in index.nearby(car.x, car.y, car.width, car.height)}
+
+
+def test_leader_candidates_contain_brute_force_leader():
+    rng = random.Random(2)
+    cars = random_cars(rng, 300)
+    index = SpatialIndex()
+    index.rebuild(cars)
+    for car in cars:
+        leader = car.get_car_in_proximity(cars, 100)
+        if leader is not None:
+            assert any(candidate is leader for candidate in index.leader_candidates(car, 100))
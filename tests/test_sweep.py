@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import pytest
+from simulation.sweep import expand_trials
+
+
+def test_expand_trials_scopes_parameters():
+    trials = expand_trials({'models': ['q', 'dqn'], 'seeds': 2,
+                            'grid': {'env.crash_penalty': [1000, 10000], 'q.alpha': [0.1, 0.3], 'dqn.lr': [1e-3]}})
+    assert len(trials) == 2 * 2 * 2 + 2 * 2
+    assert {tuple(sorted(trial['params'])) for trial in trials if trial['model'] == 'q'} == {('env.crash_penalty', 'q.alpha')}
+    assert [trial['id'] for trial in trials] == list(range(len(trials)))
+
+
+@pytest.mark.parametrize("spec", [
+    {'models': ['q', 'dqn'], 'grid': {'agent.lr': [1e-3]}},
+    {'models': ['dqn'], 'random': {'samples': 2, 'params': {'dqn.alpha': {'uniform': [0.1, 0.5]}}}},
+])
+def test_expand_trials_rejects_parameters_an_agent_does_not_accept(spec):
+    with pytest.raises(ValueError, match=r"agent\.lr.* q agent|dqn\.alpha.* dqn agent"):
+        expand_trials(spec)
+
+
+def test_checking_dqn_parameters_does_not_import_torch():
+    code = ("import sys; from simulation.sweep import expand_trials; "
+            "expand_trials({'models': ['dqn'], 'grid': {'dqn.lr': [1e-3]}}); print('torch' in sys.modules)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == 'False'
@@ -0,0 +1,30 @@
+import numpy as np
+from env.trajectory_log import TrajectoryReader, TrajectoryWriter
+from simulation.clock import SimulationClock
+from simulation.runner import create_simulation
+
+
+def test_round_trip_across_chunks(tmp_path):
+    writer = TrajectoryWriter(str(tmp_path), 2, 2, chunk_size=4)
+    for i in range(10):
+        state = {'traffic_lights': [(0, 0, i % 3, 0.0), (0, 0, 2, 0.0)],
+                 'cars_in_stopping_areas': [i, 0], 'cars_at_end_areas': [0, i % 2]}
+        writer.append(16 * i, i // 5, i % 2, -float(i), i == 4, state)
+    writer.close()
+
+    log = TrajectoryReader(str(tmp_path))
+    assert len(log) == 10
+    assert log['time_ms'].tolist() == [16 * i for i in range(10)]
+    assert log['episode'].tolist() == [i // 5 for i in range(10)]
+    assert log['done'].tolist() == [i == 4 for i in range(10)]
+    assert np.array_equal(log['light_state'][:, 0], [i % 3 for i in range(10)])
+    assert np.array_equal(log['cars_in_stopping_areas'][:, 0], np.arange(10))
+
+
+def test_simulation_logs_clock_milliseconds(tmp_path):
+    clock = SimulationClock(tick_ms=16)
+    sim = create_simulation('q', clock=clock, log_dir=str(tmp_path), trajectory_log=True)
+    for _ in range(20):
+        sim.update(clock.tick())
+    sim.close()
+    assert TrajectoryReader(str(tmp_path / "trajectory"))['time_ms'].tolist() == [16 * (i + 1) for i in range(20)]